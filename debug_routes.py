@@ -0,0 +1,57 @@
+import importlib
+
+from flask import Blueprint, session, jsonify, make_response
+
+# --- Debug Routes ---
+# Checks that the PDF stack imports and renders. Part of the 'compute' service.
+debug_bp = Blueprint('debug', __name__)
+
+@debug_bp.route('/test_pdf')
+def test_pdf():
+    """Test route to check PDF generation with minimal data"""
+    if 'user_id' not in session:
+        session['user_id'] = 'test_user'
+        session['role'] = 'patient'
+    
+    try:
+        # Test if fpdf is available
+        from pdf_reports import ReportPDF, pdf_output_bytes
+
+        # Create a simple test PDF
+        pdf = ReportPDF('simple')
+        pdf.text_line('Test PDF Generation', height=10, size=16, style='B', align='C')
+        pdf.ln(10)
+        pdf.text_line('This is a test PDF to verify functionality.', height=10)
+        pdf_content = pdf_output_bytes(pdf)
+
+        # Create response
+        response = make_response(pdf_content)
+        response.headers['Content-Type'] = 'application/pdf'
+        response.headers['Content-Disposition'] = 'attachment; filename=test.pdf'
+        
+        return response
+        
+    except ImportError as e:
+        return f"FPDF not available: {str(e)}. Please install with: pip install fpdf2"
+    except Exception as e:
+        return f"Test failed: {str(e)}"
+
+@debug_bp.route('/debug_imports')
+def debug_imports():
+    """Debug endpoint to check if all required imports work"""
+    results = {}
+    
+    checks = {
+        'fpdf': ('fpdf',),
+        'health_analyzer': ('health_analyzer',),
+        'standard_libs': ('json', 'time'),
+    }
+    for name, modules in checks.items():
+        try:
+            for module in modules:
+                importlib.import_module(module)
+            results[name] = 'OK'
+        except ImportError as e:
+            results[name] = f'ERROR: {e}'
+    
+    return jsonify(results)
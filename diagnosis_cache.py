@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import threading
+
+from health_analyzer import calculate_health_metrics
+
+
+def summarize_diagnosis(diagnosis_data):
+    """Builds the diagnosis summary shown for a patient on the doctor's diet-chart page."""
+    form_data = diagnosis_data.get('form_data', {})
+    ppg_results = diagnosis_data.get('ppg_results', {})
+    metrics = calculate_health_metrics(form_data, ppg_results)
+
+    return {
+        'dominant_dosha': diagnosis_data.get('dominant_dosha', 'N/A'),
+        'health_goals': form_data.get('health_goal', 'N/A'),
+        'dietary_preferences': form_data.get('dietary_preferences', 'N/A'),
+        'allergies': form_data.get('allergies', 'N/A'),
+        'bmi_value': metrics.get('bmi_value', 'N/A'),
+        'bmi_category': metrics.get('bmi_category', 'Not Calculated'),
+        'heart_rate': int(metrics.get('heart_rate')) if metrics.get('heart_rate') else "N/A",
+        'protein_target': metrics.get('protein_target', 'Not Calculated')
+    }
+
+
+class DiagnosisMetricsCache:
+    """
+    Caches the derived metrics of each patient_diagnosis_<id>.json, keyed by a
+    hash of the file contents. An unchanged (mtime, size) skips even the read.
+    `summarize` turns the diagnosis into what is cached (the doctor-facing
+    summary by default).
+    """
+
+    def __init__(self, data_dir='data', summarize=summarize_diagnosis):
+        self.data_dir = data_dir
+        self.summarize = summarize
+        self._lock = threading.Lock()
+        # patient_id -> (mtime_ns, size, sha256 digest, summary)
+        self._entries = {}
+        self.hits = self.misses = 0
+
+    def path_for(self, patient_id):
+        return os.path.join(self.data_dir, f'patient_diagnosis_{patient_id}.json')
+
+    def get(self, patient_id):
+        """
+        Returns the diagnosis summary for a patient.
+        Raises FileNotFoundError / json.JSONDecodeError like reading the file would.
+        """
+        path = self.path_for(patient_id)
+        stat = os.stat(path)
+        entry = self._entries.get(patient_id)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            with self._lock:
+                self.hits += 1
+            return entry[3]
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        unchanged = entry and entry[2] == digest
+        summary = entry[3] if unchanged else self.summarize(json.loads(raw))
+
+        with self._lock:
+            if unchanged:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._entries[patient_id] = (stat.st_mtime_ns, stat.st_size, digest, summary)
+        return summary
+
+    def refresh(self, patient_id):
+        """Recomputes a patient's metrics right after their diagnosis file is saved."""
+        try:
+            return self.get(patient_id)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self._entries.pop(patient_id, None)
+            return None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        }
@@ -0,0 +1,130 @@
+import json
+
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
+
+from stores import request_storage, user_directory, diagnosis_metrics
+
+# --- Doctor Authentication, Dashboard and Patient Management Routes ---
+# Part of the 'api' service; the diet chart PDF itself is rendered by report_routes.
+doctor_bp = Blueprint('doctor', __name__)
+
+@doctor_bp.route('/doctor/login', methods=['POST'])
+def doctor_login():
+    """Handles the doctor login form submission."""
+    user_id = request.form.get('user_id')
+    password = request.form.get('password')
+
+    if user_directory.authenticate('doctor', user_id, password):
+        session['user_id'] = user_id
+        session['role'] = 'doctor'
+        return redirect(url_for('.doctor_dashboard'))
+
+    flash('Invalid credentials. Please try again.', 'error')
+    return redirect(url_for('public.signup'))
+
+@doctor_bp.route('/doctor/dashboard')
+def doctor_dashboard():
+    """Renders the doctor's main dashboard page."""
+    if 'user_id' in session and session.get('role') == 'doctor':
+        return render_template('doctor_dashboard.html')
+    return redirect(url_for('public.signup'))
+
+@doctor_bp.route('/doctor/requests')
+def doctor_patient_requests():
+    """Renders the page that lists patient requests for the doctor."""
+    if 'user_id' in session and session.get('role') == 'doctor':
+        doctor_id = session['user_id']
+        doctor_requests = request_storage.for_doctor(doctor_id, statuses=('pending', 'accepted'))
+
+        # Filter requests for the logged-in doctor
+        pending_requests = []
+        current_patients = []
+        for req in doctor_requests:
+            patient = user_directory.get(req.get('patient_id'))
+            if patient:
+                if req.get('status') == 'pending':
+                    pending_requests.append({'request': req, 'patient': patient})
+                elif req.get('status') == 'accepted':
+                    current_patients.append(patient)
+        return render_template('doctor_patient_requests.html', pending_requests=pending_requests, current_patients=current_patients)
+    return redirect(url_for('public.signup'))
+
+@doctor_bp.route('/doctor/diet-chart')
+def doctor_diet_chart():
+    """Renders the diet chart creation page for the doctor."""
+    if 'user_id' in session and session.get('role') == 'doctor':
+        doctor_id = session['user_id']
+        accepted_requests = request_storage.for_doctor(doctor_id, statuses=('accepted',))
+
+        current_patients = []
+        for req in accepted_requests:
+            patient = user_directory.get(req.get('patient_id'))
+            if patient:
+                # Copy so the diagnosis below doesn't leak into the shared directory entry
+                patient = dict(patient)
+                try:
+                    patient['diagnosis'] = diagnosis_metrics.get(patient['id'])
+                except (FileNotFoundError, json.JSONDecodeError):
+                    patient['diagnosis'] = None
+                current_patients.append(patient)
+
+        return render_template('doctor_diet_chart.html', current_patients=current_patients)
+    return redirect(url_for('public.signup'))
+
+
+@doctor_bp.route('/doctor/profile')
+def doctor_profile():
+    """Renders the doctor's profile page."""
+    if 'user_id' in session and session.get('role') == 'doctor':
+        return render_template('doctor_profile.html')
+    return redirect(url_for('public.signup'))
+
+@doctor_bp.route('/doctor/handle-request', methods=['POST'])
+def handle_patient_request():
+    """Handles accepting or declining a patient request."""
+    if 'user_id' not in session or session.get('role') != 'doctor':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    data = request.get_json()
+    if not data:
+        return jsonify({'success': False, 'message': 'Invalid request'}), 400
+
+    patient_id = data.get('patient_id')
+    action = data.get('action')
+    doctor_id = session['user_id']
+
+    new_status = {'accept': 'accepted', 'decline': 'declined'}.get(action)
+
+    if new_status and request_storage.update_status(doctor_id, patient_id, 'pending', new_status):
+        if action == 'accept':
+            patient_details = user_directory.get(patient_id)
+            if patient_details:
+                return jsonify({'success': True, 'patient': patient_details})
+            else:
+                return jsonify({'success': False, 'message': 'Patient not found.'})
+
+        return jsonify({'success': True})
+
+    return jsonify({'success': False, 'message': 'Request not found or already handled.'})
+
+
+@doctor_bp.route('/doctor/remove-patient', methods=['POST'])
+def remove_patient():
+    """Handles removing a patient from the doctor's current patient list."""
+    if 'user_id' not in session or session.get('role') != 'doctor':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'success': False, 'message': 'Invalid request'}), 400
+
+        patient_id = data.get('patient_id')
+        doctor_id = session['user_id']
+
+        if request_storage.update_status(doctor_id, patient_id, 'accepted', 'declined'):
+            return jsonify({'success': True})
+
+        return jsonify({'success': False, 'message': 'Patient not found in your list.'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
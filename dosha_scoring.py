@@ -0,0 +1,74 @@
+import numpy as np
+
+from health_analyzer import DOSHA_ORDER, DOSHA_SCORING_TABLE
+
+
+class DoshaScoringModel:
+    """
+    Vectorised form of health_analyzer.DOSHA_SCORING_TABLE for scoring thousands
+    of questionnaires at once.
+
+    Questionnaires are first encoded into an (n, questions) matrix of answer
+    codes, where code 0 means "missing or unrecognised answer". Scoring is then
+    a single gather-and-sum over a (questions, answers + 1, 3) weight array.
+    Encoded questionnaires can be kept and re-scored after the weights change
+    (see with_weights) without touching the original dicts again.
+    """
+
+    def __init__(self, scoring_table=DOSHA_SCORING_TABLE):
+        self.scoring_table = scoring_table
+        self.questions = tuple(scoring_table)
+        self.answer_codes = tuple(
+            {answer: code for code, answer in enumerate(answers, start=1)}
+            for answers in scoring_table.values()
+        )
+
+        max_answers = max((len(codes) for codes in self.answer_codes), default=0)
+        self.weights = np.zeros((len(self.questions), max_answers + 1, len(DOSHA_ORDER)))
+        for q, answers in enumerate(scoring_table.values()):
+            for code, weights in enumerate(answers.values(), start=1):
+                self.weights[q, code] = weights
+
+    def with_weights(self, scoring_table):
+        """
+        Returns a model for a re-weighted table. If the table has the same
+        questions and answers, codes from encode() remain valid for the new model.
+        """
+        return DoshaScoringModel(scoring_table)
+
+    def encode(self, forms):
+        """Encodes an iterable of questionnaire dicts into an (n, questions) int array."""
+        forms = list(forms)
+        codes = np.zeros((len(forms), len(self.questions)), dtype=np.intp)
+        for q, (question, answer_codes) in enumerate(zip(self.questions, self.answer_codes)):
+            codes[:, q] = [
+                answer_codes.get(answer, 0) if isinstance(answer, str) else 0
+                for answer in (form.get(question) for form in forms)
+            ]
+        return codes
+
+    def score(self, codes):
+        """Returns an (n, 3) array of Vata/Pitta/Kapha scores for encoded questionnaires."""
+        codes = np.asarray(codes, dtype=np.intp)
+        question_index = np.arange(len(self.questions))
+        return self.weights[question_index, codes].sum(axis=1)
+
+    def dominant(self, scores):
+        """
+        Returns the dominant dosha per row, matching determine_dominant_dosha:
+        ties go to the earlier dosha and all-zero rows are 'Tridoshic'.
+        """
+        names = np.array(DOSHA_ORDER + ('Tridoshic',), dtype=object)
+        winners = np.argmax(scores, axis=1)
+        winners[~np.any(scores != 0, axis=1)] = len(DOSHA_ORDER)
+        return names[winners]
+
+    def score_batch(self, forms):
+        """Scores questionnaire dicts in one go. Returns (scores, dominant doshas)."""
+        scores = self.score(self.encode(forms))
+        return scores, self.dominant(scores)
+
+
+def score_questionnaires(forms, scoring_table=DOSHA_SCORING_TABLE):
+    """Convenience wrapper: returns (scores, dominant doshas) for a list of questionnaires."""
+    return DoshaScoringModel(scoring_table).score_batch(forms)
@@ -0,0 +1,90 @@
+import cv2
+import numpy as np
+
+# Run the full Haar detection at most this many frames apart
+DETECT_EVERY = 10
+# Detection and tracking run on the grey frame scaled by this factor
+DETECT_SCALE = 0.5
+# Below this template-match score the track is considered lost
+MIN_TRACK_CONFIDENCE = 0.6
+
+
+class FaceTracker:
+    """
+    Detect-then-track face localisation for the PPG pipeline.
+
+    The Haar cascade runs on a downscaled grey frame only every `detect_every`
+    frames, or as soon as tracking confidence drops. In between, the face box
+    from the last detection is followed by template matching in a small search
+    window around its previous position, which costs a fraction of a
+    detectMultiScale call.
+
+    Only the largest face is tracked: it is the person being measured.
+    """
+
+    def __init__(self, face_cascade, detect_every=DETECT_EVERY, scale=DETECT_SCALE,
+                 min_confidence=MIN_TRACK_CONFIDENCE):
+        self.face_cascade = face_cascade
+        self.detect_every = detect_every
+        self.scale = scale
+        self.min_confidence = min_confidence
+        self.confidence = 0.0
+        self.detections = 0
+        self.frames = 0
+        self._box = None        # (x, y, w, h) in downscaled coordinates
+        self._template = None
+        self._frames_since_detect = 0
+
+    def reset(self):
+        self._box = None
+        self._template = None
+        self.confidence = 0.0
+
+    def update(self, gray):
+        """Returns the tracked face as a tuple of (x, y, w, h) boxes in full-frame coordinates (empty if none)."""
+        self.frames += 1
+        small = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+        box = None
+        if self._template is not None and self._frames_since_detect < self.detect_every:
+            box = self._track(small)
+        if box is None:
+            box = self._detect(small)
+        if box is None:
+            self.reset()
+            return ()
+
+        self._box = box
+        self._frames_since_detect += 1
+        x, y, w, h = box
+        inv = 1.0 / self.scale
+        return ((int(x * inv), int(y * inv), int(w * inv), int(h * inv)),)
+
+    def _detect(self, small):
+        self.detections += 1
+        self._frames_since_detect = 0
+        faces = self.face_cascade.detectMultiScale(small, 1.1, 4)
+        if len(faces) == 0:
+            return None
+        x, y, w, h = (int(v) for v in max(faces, key=lambda f: f[2] * f[3]))
+        self._template = small[y:y + h, x:x + w].copy()
+        self.confidence = 1.0
+        return x, y, w, h
+
+    def _track(self, small):
+        """Finds the template near the previous box; returns None if the match is too weak."""
+        x, y, w, h = self._box
+        margin_x, margin_y = w // 2, h // 2
+        x0, y0 = max(x - margin_x, 0), max(y - margin_y, 0)
+        x1 = min(x + w + margin_x, small.shape[1])
+        y1 = min(y + h + margin_y, small.shape[0])
+        window = small[y0:y1, x0:x1]
+        if window.shape[0] < h or window.shape[1] < w:
+            return None
+
+        scores = cv2.matchTemplate(window, self._template, cv2.TM_CCOEFF_NORMED)
+        _, confidence, _, (dx, dy) = cv2.minMaxLoc(scores)
+        self.confidence = confidence if np.isfinite(confidence) else 0.0
+        if self.confidence < self.min_confidence:
+            return None
+        return x0 + dx, y0 + dy, w, h
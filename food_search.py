@@ -0,0 +1,222 @@
+import heapq
+import re
+from bisect import bisect_left, bisect_right
+
+DOSHAS = ('vata', 'pitta', 'kapha')
+RASAS = ('sweet', 'sour', 'salty', 'pungent', 'bitter', 'astringent')
+NUTRIENTS = ('energy_kcal', 'protein_g', 'carb_g', 'fat_g', 'fibre_g')
+# Dosha effects that make a food suitable for someone with that dosha (as in recipe_store)
+SUITABLE_EFFECTS = ('decrease', 'neutral')
+
+# Words in queries that name a nutrient
+NUTRIENT_WORDS = {
+    'kcal': 'energy_kcal', 'cal': 'energy_kcal', 'cals': 'energy_kcal', 'calorie': 'energy_kcal',
+    'calories': 'energy_kcal', 'energy': 'energy_kcal',
+    'protein': 'protein_g', 'proteins': 'protein_g',
+    'carb': 'carb_g', 'carbs': 'carb_g', 'carbohydrate': 'carb_g', 'carbohydrates': 'carb_g',
+    'fat': 'fat_g', 'fats': 'fat_g',
+    'fibre': 'fibre_g', 'fiber': 'fibre_g',
+}
+RASA_WORDS = {rasa: rasa for rasa in RASAS}
+RASA_WORDS.update({'spicy': 'pungent', 'salted': 'salty', 'tangy': 'sour'})
+MEAL_WORDS = ('breakfast', 'lunch', 'dinner', 'snack', 'snacks')
+# "high-protein" keeps foods in the top quarter for that nutrient, "low-fat" the bottom quarter
+QUALIFIER_QUANTILE = 0.25
+# Query words that never narrow a name search
+STOP_WORDS = frozenset('a an and dish dishes food foods for friendly i in me of on some the to with'.split())
+
+_NUMBER = r'(\d+(?:\.\d+)?)\s*(?:g|gm|grams?)?'
+_UNIT = r'(' + '|'.join(sorted(NUTRIENT_WORDS, key=len, reverse=True)) + r')\b'
+_UPPER = re.compile(r'\b(?:under|below|less than|at most|max(?:imum)?|upto|up to|<)\s*' + _NUMBER + r'\s*(?:of\s+)?' + _UNIT)
+_LOWER = re.compile(r'\b(?:over|above|more than|at least|min(?:imum)?|>)\s*' + _NUMBER + r'\s*(?:of\s+)?' + _UNIT)
+_QUALIFIED = re.compile(r'\b(high|rich|low|lean)(?:[\s-]+in)?[\s-]+' + _UNIT)
+_DOSHA = re.compile(r'\b(' + '|'.join(DOSHAS) + r')\b')
+
+
+def tokenize(text):
+    return re.findall(r'[a-z0-9]+', text.lower())
+
+
+def parse_food_query(text):
+    """
+    Turns a free-text request into search constraints:
+    {'terms', 'rasas', 'dosha', 'meal', 'ranges': {nutrient: (low, high)},
+     'qualifiers': {nutrient: 'high' | 'low'}}.
+    e.g. "high-protein kapha-friendly breakfast under 300 kcal".
+    """
+    text = text.lower()
+    ranges = {}
+    for pattern, bound in ((_UPPER, 1), (_LOWER, 0)):
+        for value, unit in pattern.findall(text):
+            low, high = ranges.get(NUTRIENT_WORDS[unit], (None, None))
+            ranges[NUTRIENT_WORDS[unit]] = (float(value), high) if bound == 0 else (low, float(value))
+        text = pattern.sub(' ', text)
+
+    qualifiers = {}
+    for level, unit in _QUALIFIED.findall(text):
+        qualifiers[NUTRIENT_WORDS[unit]] = 'high' if level in ('high', 'rich') else 'low'
+    text = _QUALIFIED.sub(' ', text)
+
+    doshas = _DOSHA.findall(text)
+    tokens = [token for token in tokenize(_DOSHA.sub(' ', text)) if token not in STOP_WORDS]
+    return {
+        'terms': [token for token in tokens if token not in RASA_WORDS and token not in MEAL_WORDS],
+        'rasas': sorted({RASA_WORDS[token] for token in tokens if token in RASA_WORDS}),
+        'dosha': doshas[0] if doshas else None,
+        'meal': next((token for token in tokens if token in MEAL_WORDS), None),
+        'ranges': ranges,
+        'qualifiers': qualifiers,
+    }
+
+
+class FoodIndex:
+    """
+    Search index over the food database, built once when the database is loaded.
+
+    - an inverted index from food-name tokens to food ids
+    - facet indexes for rasa and for each dosha's effect (decrease / neutral / increase)
+    - a meal facet from `meal_keywords` ({meal: name keywords}), placing foods
+      in meals the way health_analyzer.build_meal_options does
+    - a sorted (value, id) list per nutrient, so a numeric range is two bisects
+
+    A search intersects the id sets of its constraints, starting from the
+    smallest, and ranks what is left. Foods are returned as the original dicts.
+    """
+
+    def __init__(self, foods, meal_keywords=None):
+        self.foods = tuple(foods)
+        self.meals = tuple(meal_keywords or ())
+        self.all_ids = frozenset(range(len(self.foods)))
+        names, facets, values = {}, {}, {nutrient: [] for nutrient in NUTRIENTS}
+
+        for food_id, food in enumerate(self.foods):
+            name = food.get('food_name', '')
+            for token in set(tokenize(name)):
+                names.setdefault(token, set()).add(food_id)
+            for meal, keywords in (meal_keywords or {}).items():
+                if any(keyword in name.lower() for keyword in keywords):
+                    facets.setdefault(('meal', meal), set()).add(food_id)
+            properties = food.get('ayurvedic_properties', {})
+            for rasa in properties.get('rasa', ()):
+                facets.setdefault(('rasa', rasa.lower()), set()).add(food_id)
+            for dosha in DOSHAS:
+                effect = str(properties.get(dosha, '')).lower()
+                facets.setdefault((dosha, effect), set()).add(food_id)
+            for nutrient in NUTRIENTS:
+                value = food.get(nutrient)
+                if isinstance(value, (int, float)):
+                    values[nutrient].append((float(value), food_id))
+
+        self._names = {token: frozenset(ids) for token, ids in names.items()}
+        self._facets = {key: frozenset(ids) for key, ids in facets.items()}
+        self._values = {nutrient: sorted(pairs) for nutrient, pairs in values.items()}
+        self._keys = {nutrient: [value for value, _ in pairs] for nutrient, pairs in self._values.items()}
+        # Nutrient values by food id, 0 where missing
+        self._columns = {nutrient: [0.0] * len(self.foods) for nutrient in NUTRIENTS}
+        for nutrient, pairs in self._values.items():
+            for value, food_id in pairs:
+                self._columns[nutrient][food_id] = value
+        self._suitable = {dosha: frozenset().union(*(self.facet(dosha, effect) for effect in SUITABLE_EFFECTS))
+                          for dosha in DOSHAS}
+
+    def __len__(self):
+        return len(self.foods)
+
+    def value(self, food_id, nutrient):
+        return self._columns[nutrient][food_id]
+
+    def quantile(self, nutrient, q):
+        keys = self._keys[nutrient]
+        return keys[min(int(q * len(keys)), len(keys) - 1)] if keys else 0.0
+
+    def vocabulary(self):
+        """Food-name tokens worth matching on their own: no stop words, tastes or numbers."""
+        return sorted(token for token in self._names
+                      if len(token) > 2 and not token.isdigit() and token not in STOP_WORDS and token not in RASA_WORDS)
+
+    def name_matches(self, term):
+        """Ids of foods whose name has the token `term` (a trailing plural 's' is ignored)."""
+        ids = self._names.get(term, frozenset())
+        if term.endswith('s') and len(term) > 3:
+            ids = ids | self._names.get(term[:-1], frozenset())
+        return ids
+
+    def facet(self, name, value):
+        return self._facets.get((name, value.lower()), frozenset())
+
+    def suitable_for(self, dosha):
+        """Ids of foods that decrease or are neutral for `dosha`."""
+        return self._suitable.get(dosha.lower(), frozenset())
+
+    def range_slice(self, nutrient, low=None, high=None):
+        """(start, end) of the foods with low <= nutrient <= high in the sorted index; either bound may be None."""
+        keys = self._keys[nutrient]
+        start = 0 if low is None else bisect_left(keys, low)
+        end = len(keys) if high is None else bisect_right(keys, high)
+        return start, max(start, end)
+
+    def in_range(self, nutrient, low=None, high=None):
+        """Ids of foods with low <= nutrient <= high; either bound may be None."""
+        start, end = self.range_slice(nutrient, low, high)
+        return frozenset(food_id for _, food_id in self._values[nutrient][start:end])
+
+    def search(self, terms=(), rasas=(), dosha=None, meal=None, ranges=None, qualifiers=None, limit=5):
+        """
+        Returns up to `limit` foods matching every constraint, best first.
+        `meal` keeps only that meal's foods; a meal the index has no keywords
+        for (see `meals`) is ignored.
+        Name terms are optional matches: foods matching more terms rank higher,
+        but a query whose terms match no name is answered from the other
+        constraints. Then high/low qualifiers order the results, then foods
+        that decrease (rather than merely suit) `dosha` come first.
+        """
+        ranges, qualifiers = ranges or {}, qualifiers or {}
+        sets = [self.facet('rasa', rasa) for rasa in rasas]
+        if dosha:
+            sets.append(self.suitable_for(dosha))
+        if meal in self.meals:
+            sets.append(self.facet('meal', meal))
+        bounds = dict(ranges)
+        for nutrient, level in qualifiers.items():
+            low, high = bounds.get(nutrient, (None, None))
+            if level == 'high':
+                low = max(low or 0.0, self.quantile(nutrient, 1 - QUALIFIER_QUANTILE))
+            else:
+                high = min(high if high is not None else float('inf'), self.quantile(nutrient, QUALIFIER_QUANTILE))
+            bounds[nutrient] = (low, high)
+
+        candidates = self.all_ids
+        for ids in sorted(sets, key=len):
+            candidates = candidates & ids
+        # A range is only turned into an id set while that is cheaper than
+        # checking the values of the remaining candidates
+        for nutrient, (low, high) in bounds.items():
+            start, end = self.range_slice(nutrient, low, high)
+            if end - start < len(candidates):
+                candidates = candidates & self.in_range(nutrient, low, high)
+            else:
+                column = self._columns[nutrient]
+                low = float('-inf') if low is None else low
+                high = float('inf') if high is None else high
+                candidates = frozenset(food_id for food_id in candidates if low <= column[food_id] <= high)
+            if not candidates:
+                return []
+
+        hits = {}
+        for term in terms:
+            for food_id in self.name_matches(term) & candidates:
+                hits[food_id] = hits.get(food_id, 0) + 1
+        if hits:
+            candidates = hits.keys()
+
+        decreasing = self.facet(dosha, 'decrease') if dosha else frozenset()
+
+        def rank(food_id):
+            order = [-hits.get(food_id, 0)]
+            for nutrient, level in qualifiers.items():
+                order.append(-self.value(food_id, nutrient) if level == 'high' else self.value(food_id, nutrient))
+            order.append(food_id not in decreasing)
+            order.append(food_id)
+            return order
+
+        return [self.foods[food_id] for food_id in heapq.nsmallest(limit, candidates, key=rank)]
@@ -1,5 +1,7 @@
 import json
 import random
+from concurrent.futures import ProcessPoolExecutor
+from types import MappingProxyType
 
 # --- Load Food Database ---
 try:
@@ -8,6 +10,48 @@ try:
 except (FileNotFoundError, json.JSONDecodeError):
     FOOD_DATA = []
 
+# Dosha effects that make a food safe for a person with that dominant dosha
+SUITABLE_EFFECTS = ('Decrease', 'Neutral')
+
+# Name keywords that place a food into a meal slot of the meal plan
+MEAL_KEYWORDS = {
+    'breakfast': ('poha', 'upma', 'idli', 'dosa', 'oats'),
+    'lunch': ('roti', 'chapati', 'rice', 'dal', 'sabzi', 'curry'),
+    'dinner': ('khichdi', 'soup', 'dal'),
+}
+
+
+def build_meal_options(foods):
+    """Splits foods into breakfast/lunch/dinner candidates by name keywords."""
+    options = {meal: [] for meal in MEAL_KEYWORDS}
+    for food in foods:
+        name = food['food_name'].lower()
+        for meal, keywords in MEAL_KEYWORDS.items():
+            if any(k in name for k in keywords):
+                options[meal].append(food)
+    return MappingProxyType({meal: tuple(items) for meal, items in options.items()})
+
+
+def build_food_index(foods):
+    """
+    Partitions the food database once by dosha suitability and, within each
+    dosha, by meal slot. Returns read-only (safe_foods, meal_options) mappings
+    keyed by lower-case dosha name.
+    """
+    safe_foods = {}
+    meal_options = {}
+    for dosha in ('vata', 'pitta', 'kapha'):
+        safe_foods[dosha] = tuple(
+            food for food in foods
+            if food.get('ayurvedic_properties', {}).get(dosha) in SUITABLE_EFFECTS
+        )
+        meal_options[dosha] = build_meal_options(safe_foods[dosha])
+    return MappingProxyType(safe_foods), MappingProxyType(meal_options)
+
+
+SAFE_FOODS_BY_DOSHA, MEAL_OPTIONS_BY_DOSHA = build_food_index(FOOD_DATA)
+NO_MEAL_OPTIONS = build_meal_options(())
+
 # --- NEW: Helper function to calculate BMI ---
 def calculate_bmi(form_data):
     """Calculates BMI and provides a category."""
@@ -54,24 +98,42 @@ def calculate_protein_needs(form_data):
         return "N/A"
 
 
+def calculate_health_metrics(form_data, ppg_data):
+    """
+    Computes only the key health metrics (BMI, protein target, heart rate),
+    skipping food filtering and meal-plan generation.
+    """
+    bmi_value, bmi_category = calculate_bmi(form_data)
+    return {
+        'bmi_value': bmi_value,
+        'bmi_category': bmi_category,
+        'protein_target': calculate_protein_needs(form_data),
+        'heart_rate': ppg_data.get('heart_rate')
+    }
+
+
 def generate_health_profile(form_data, ppg_data, plan_type='daily'):
     """
     MODIFIED: Analyzes user data and calculates key health metrics.
     """
-    # --- 1. Rule-Based Engine: Determine Dosha & Caloric Needs ---
+    # --- 1. Rule-Based Engine: Determine Dosha ---
     dominant_dosha = determine_dominant_dosha(form_data)
+    return build_health_profile(form_data, ppg_data, dominant_dosha, plan_type)
+
+
+def build_health_profile(form_data, ppg_data, dominant_dosha, plan_type='daily', rng=random):
+    """
+    Builds the health profile for an already-determined dominant dosha.
+    rng is the random source used for meal sampling (a random.Random for reproducible plans).
+    """
     caloric_needs = calculate_caloric_needs(form_data)
 
     # --- NEW: Calculate additional health metrics ---
-    bmi_value, bmi_category = calculate_bmi(form_data)
-    protein_target = calculate_protein_needs(form_data)
-    heart_rate = ppg_data.get('heart_rate')
+    metrics = calculate_health_metrics(form_data, ppg_data)
 
-    # --- 2. Rule-Based Engine: Filter Food Database ---
-    approved_foods = [
-        food for food in FOOD_DATA
-        if food.get('ayurvedic_properties', {}).get(dominant_dosha.lower()) in ['Decrease', 'Neutral']
-    ]
+    # --- 2. Rule-Based Engine: Look up the pre-filtered Food Database ---
+    approved_foods = SAFE_FOODS_BY_DOSHA.get(dominant_dosha.lower(), ())
+    meal_options = MEAL_OPTIONS_BY_DOSHA.get(dominant_dosha.lower(), NO_MEAL_OPTIONS)
 
     # --- 3. Generate Health Profile Summary for the LLM ---
     summary = generate_profile_summary(form_data, ppg_data, dominant_dosha)
@@ -83,66 +145,55 @@ def generate_health_profile(form_data, ppg_data, plan_type='daily'):
         profile=summary,
         safe_foods=approved_foods,
         plan_type=plan_type,
-        bmi_value=bmi_value,
-        bmi_category=bmi_category,
-        protein_target=protein_target,
-        heart_rate=heart_rate
+        meal_options=meal_options,
+        rng=rng,
+        **metrics
     )
 
     return simulated_llm_output
 
 
-def determine_dominant_dosha(form_data):
-    """
-    Determines dominant dosha based on a weighted scoring of the form data.
-    """
-    scores = {'Vata': 0, 'Pitta': 0, 'Kapha': 0}
+# --- Dosha questionnaire scoring table: question -> answer -> (Vata, Pitta, Kapha) weights ---
+DOSHA_ORDER = ('Vata', 'Pitta', 'Kapha')
 
+DOSHA_SCORING_TABLE = {
     # Physical Nature (Deha Prakriti)
-    if form_data.get('body_frame') == 'light_lean': scores['Vata'] += 2
-    if form_data.get('body_frame') == 'moderate_athletic': scores['Pitta'] += 2
-    if form_data.get('body_frame') == 'solid_sturdy': scores['Kapha'] += 2
-
-    if form_data.get('skin_texture') == 'dry_cool': scores['Vata'] += 1
-    if form_data.get('skin_texture') == 'warm_sensitive': scores['Pitta'] += 1
-    if form_data.get('skin_texture') == 'thick_smooth': scores['Kapha'] += 1
-
-    if form_data.get('hair_type') == 'dry_brittle': scores['Vata'] += 1
-    if form_data.get('hair_type') == 'fine_oily': scores['Pitta'] += 1
-    if form_data.get('hair_type') == 'thick_lustrous': scores['Kapha'] += 1
+    'body_frame': {'light_lean': (2, 0, 0), 'moderate_athletic': (0, 2, 0), 'solid_sturdy': (0, 0, 2)},
+    'skin_texture': {'dry_cool': (1, 0, 0), 'warm_sensitive': (0, 1, 0), 'thick_smooth': (0, 0, 1)},
+    'hair_type': {'dry_brittle': (1, 0, 0), 'fine_oily': (0, 1, 0), 'thick_lustrous': (0, 0, 1)},
 
     # Metabolism & Digestion (Agni)
-    if form_data.get('appetite') == 'unpredictable': scores['Vata'] += 2
-    if form_data.get('appetite') == 'strong_urgent': scores['Pitta'] += 2
-    if form_data.get('appetite') == 'slow_steady': scores['Kapha'] += 2
-
-    if form_data.get('digestion') == 'dry_gas': scores['Vata'] += 1
-    if form_data.get('digestion') == 'acidity_urgency': scores['Pitta'] += 1
-    if form_data.get('digestion') == 'slow_heaviness': scores['Kapha'] += 1
+    'appetite': {'unpredictable': (2, 0, 0), 'strong_urgent': (0, 2, 0), 'slow_steady': (0, 0, 2)},
+    'digestion': {'dry_gas': (1, 0, 0), 'acidity_urgency': (0, 1, 0), 'slow_heaviness': (0, 0, 1)},
 
     # Energy & Mind (Manas Prakriti)
-    if form_data.get('energy_levels') == 'bursts_of_energy': scores['Vata'] += 1
-    if form_data.get('energy_levels') == 'focused_driven': scores['Pitta'] += 1
-    if form_data.get('energy_levels') == 'steady_enduring': scores['Kapha'] += 1
-
-    if form_data.get('stress_reaction') == 'anxiety_worry': scores['Vata'] += 1
-    if form_data.get('stress_reaction') == 'irritability_impatience': scores['Pitta'] += 1
-    if form_data.get('stress_reaction') == 'withdrawal_lethargy': scores['Kapha'] += 1
-
-    if form_data.get('sleep_pattern') == 'light_interrupted': scores['Vata'] += 1
-    if form_data.get('sleep_pattern') == 'sound_short': scores['Pitta'] += 1
-    if form_data.get('sleep_pattern') == 'deep_long': scores['Kapha'] += 1
+    'energy_levels': {'bursts_of_energy': (1, 0, 0), 'focused_driven': (0, 1, 0), 'steady_enduring': (0, 0, 1)},
+    'stress_reaction': {'anxiety_worry': (1, 0, 0), 'irritability_impatience': (0, 1, 0), 'withdrawal_lethargy': (0, 0, 1)},
+    'sleep_pattern': {'light_interrupted': (1, 0, 0), 'sound_short': (0, 1, 0), 'deep_long': (0, 0, 1)},
 
     # Subtle Indicators
-    if form_data.get('speaking_style') == 'fast_talkative': scores['Vata'] += 1
-    if form_data.get('speaking_style') == 'clear_purposeful': scores['Pitta'] += 1
-    if form_data.get('speaking_style') == 'slow_calm': scores['Kapha'] += 1
+    'speaking_style': {'fast_talkative': (1, 0, 0), 'clear_purposeful': (0, 1, 0), 'slow_calm': (0, 0, 1)},
+    'body_temperature': {'tend_to_be_cold': (1, 0, 0), 'tend_to_be_warm': (0, 1, 0), 'adaptable': (0, 0, 1)},
+}
+
 
-    if form_data.get('body_temperature') == 'tend_to_be_cold': scores['Vata'] += 1
-    if form_data.get('body_temperature') == 'tend_to_be_warm': scores['Pitta'] += 1
-    if form_data.get('body_temperature') == 'adaptable': scores['Kapha'] += 1
+def score_doshas(form_data, scoring_table=DOSHA_SCORING_TABLE):
+    """Returns the {'Vata', 'Pitta', 'Kapha'} scores of one questionnaire."""
+    totals = [0, 0, 0]
+    for question, answers in scoring_table.items():
+        answer = form_data.get(question)
+        weights = answers.get(answer) if isinstance(answer, str) else None
+        if weights:
+            for i, weight in enumerate(weights):
+                totals[i] += weight
+    return dict(zip(DOSHA_ORDER, totals))
 
 
+def determine_dominant_dosha(form_data, scoring_table=DOSHA_SCORING_TABLE):
+    """
+    Determines dominant dosha based on a weighted scoring of the form data.
+    """
+    scores = score_doshas(form_data, scoring_table)
     dominant_dosha = max(scores, key=scores.get) if any(scores.values()) else "Tridoshic"
     return dominant_dosha
 
@@ -213,7 +264,8 @@ def get_rationale(food_name, dosha):
     dosha_qualities = {
         'Vata': {'balancing': 'grounding and nourishing', 'avoiding': 'light and dry'},
         'Pitta': {'balancing': 'cooling and hydrating', 'avoiding': 'spicy and heating'},
-        'Kapha': {'balancing': 'light and stimulating', 'avoiding': 'heavy and oily'}
+        'Kapha': {'balancing': 'light and stimulating', 'avoiding': 'heavy and oily'},
+        'Tridoshic': {'balancing': 'balanced and wholesome', 'avoiding': 'extreme'}
     }
     if 'soup' in food_name.lower() or 'dal' in food_name.lower():
         return f"This is a warm, {dosha_qualities[dosha]['balancing']} choice, making it excellent for you."
@@ -223,17 +275,20 @@ def get_rationale(food_name, dosha):
         return f"A light but satisfying option to start your day without feeling heavy."
     return f"This food is chosen for its {dosha_qualities[dosha]['balancing']} properties."
 
-def generate_one_day_meal_plan(safe_foods, dosha):
+def generate_one_day_meal_plan(safe_foods, dosha, meal_options=None, rng=random):
     """
     Generates a single day's meal plan with meaningful, dosha-specific rationales.
+    Pass precomputed meal_options (see build_meal_options) to avoid re-scanning safe_foods.
     """
-    breakfast_options = [f for f in safe_foods if any(k in f['food_name'].lower() for k in ['poha', 'upma', 'idli', 'dosa', 'oats'])]
-    lunch_options = [f for f in safe_foods if any(k in f['food_name'].lower() for k in ['roti', 'chapati', 'rice', 'dal', 'sabzi', 'curry'])]
-    dinner_options = [f for f in safe_foods if any(k in f['food_name'].lower() for k in ['khichdi', 'soup', 'dal'])]
+    if meal_options is None:
+        meal_options = build_meal_options(safe_foods)
+    breakfast_options = meal_options['breakfast']
+    lunch_options = meal_options['lunch']
+    dinner_options = meal_options['dinner']
 
-    breakfast = random.choice(breakfast_options) if breakfast_options else {"food_name": "A light and suitable breakfast"}
-    lunch = random.choice(lunch_options) if lunch_options else {"food_name": "A balanced lunch"}
-    dinner = random.choice(dinner_options) if dinner_options else {"food_name": "A light dinner"}
+    breakfast = rng.choice(breakfast_options) if breakfast_options else {"food_name": "A light and suitable breakfast"}
+    lunch = rng.choice(lunch_options) if lunch_options else {"food_name": "A balanced lunch"}
+    dinner = rng.choice(dinner_options) if dinner_options else {"food_name": "A light dinner"}
 
     return [
         {"meal": "Breakfast", "food": breakfast['food_name'], "rationale": get_rationale(breakfast['food_name'], dosha)},
@@ -241,32 +296,15 @@ def generate_one_day_meal_plan(safe_foods, dosha):
         {"meal": "Dinner", "food": dinner['food_name'], "rationale": get_rationale(dinner['food_name'], dosha)}
     ]
 
-def generate_simulated_llm_response(dosha, calories, profile, safe_foods, plan_type, **kwargs):
-    """
-    MODIFIED: Now accepts and returns a dictionary with all health data.
-    """
-    meal_plan = []
-    if plan_type == 'weekly':
-        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        for day in days:
-            day_plan = generate_one_day_meal_plan(safe_foods, dosha)
-            for item in day_plan:
-                item['day'] = day
-            meal_plan.extend(day_plan)
-    else: # Default to daily
-        meal_plan = generate_one_day_meal_plan(safe_foods, dosha)
-
-    recommendations = ""
-    yoga_recommendations = ""
-
-    # ... (The logic for generating recommendations and yoga sequences remains the same) ...
-    if dosha == 'Vata':
-        recommendations = (
+# --- Static guidance text per dosha, shared by every generated profile ---
+DOSHA_GUIDANCE = {
+    'Vata': {
+        'recommendations': (
             "1. Favor warm, moist, and grounding foods. Your constitution benefits from routine and nourishment.\n"
             "2. Incorporate healthy fats like ghee and sesame oil to combat dryness.\n"
             "3. Manage a tendency towards anxiety by practicing calming activities like meditation or a gentle walk in nature."
-        )
-        yoga_recommendations = (
+        ),
+        'yoga_sequence': (
             "**Focus:** A grounding and stabilizing practice to calm the nervous system.\n"
             "**Pace:** Slow, mindful, and deliberate. Hold each pose for 5 deep breaths.\n\n"
             "**Your 10-Step Vata-Balancing Yoga Sequence:**\n"
@@ -281,13 +319,14 @@ def generate_simulated_llm_response(dosha, calories, profile, safe_foods, plan_t
             "9.  **Cool-down (Balasana / Child's Pose):** Rest your forehead on the mat and relax completely for 1 minute.\n"
             "10. **Final Relaxation (Savasana / Corpse Pose):** Lie flat on your back for 5-10 minutes, allowing your body to integrate the practice."
         )
-    elif dosha == 'Pitta':
-        recommendations = (
+    },
+    'Pitta': {
+        'recommendations': (
             "1. Favor cooling, fresh, and non-spicy foods to balance your natural heat. Avoid overly sour or salty tastes.\n"
             "2. Stay well-hydrated with water and cooling herbal teas like mint or fennel.\n"
             "3. Channel your focused energy, but avoid overheating. Engage in relaxing activities like swimming or evening strolls."
-        )
-        yoga_recommendations = (
+        ),
+        'yoga_sequence': (
             "**Focus:** A cooling and calming practice to release intensity and heat.\n"
             "**Pace:** Relaxed and non-competitive. Breathe smoothly and avoid strain.\n\n"
             "**Your 10-Step Pitta-Balancing Yoga Sequence:**\n"
@@ -302,13 +341,14 @@ def generate_simulated_llm_response(dosha, calories, profile, safe_foods, plan_t
             "9.  **Counterpose (Matsyasana / Fish Pose):** The perfect release after shoulder stand and plow.\n"
             "10. **Final Relaxation (Savasana / Corpse Pose):** Lie flat for 5-10 minutes, focusing on releasing all heat and effort."
         )
-    elif dosha == 'Kapha':
-        recommendations = (
+    },
+    'Kapha': {
+        'recommendations': (
             "1. Favor warm, light, and stimulating foods with pungent, bitter, and astringent tastes.\n"
             "2. Engage in regular, vigorous exercise to boost your metabolism and prevent stagnation.\n"
             "3. Keep your mind active and stimulated with new hobbies and challenges to prevent feelings of lethargy."
-        )
-        yoga_recommendations = (
+        ),
+        'yoga_sequence': (
             "**Focus:** An energizing and stimulating practice to invigorate the body and mind.\n"
             "**Pace:** Dynamic and flowing (Vinyasa style). Move with your breath to build heat.\n\n"
             "**Your 10-Step Kapha-Balancing Yoga Sequence:**\n"
@@ -323,11 +363,14 @@ def generate_simulated_llm_response(dosha, calories, profile, safe_foods, plan_t
             "9.  **Cool-down (Setu Bandhasana / Bridge Pose):** A gentler backbend to begin the cool-down process.\n"
             "10. **Final Relaxation (Savasana / Corpse Pose):** Despite the active practice, do not skip this. Relax for 5-10 minutes."
         )
-    else: # Tridoshic
-        recommendations = ("1. Your constitution is relatively balanced. Focus on a varied diet with fresh, seasonal foods.\n"
-                           "2. Listen to your body's signals of hunger and fullness to maintain equilibrium.\n"
-                           "3. Adapt your routine to the seasons: favor warming foods in winter and cooling foods in summer.")
-        yoga_recommendations = (
+    },
+    'Tridoshic': {
+        'recommendations': (
+            "1. Your constitution is relatively balanced. Focus on a varied diet with fresh, seasonal foods.\n"
+            "2. Listen to your body's signals of hunger and fullness to maintain equilibrium.\n"
+            "3. Adapt your routine to the seasons: favor warming foods in winter and cooling foods in summer."
+        ),
+        'yoga_sequence': (
             "**Focus:** A balanced and varied practice to maintain your natural equilibrium.\n"
             "**Pace:** Moderate and intuitive. On energetic days, practice faster; on tired days, practice slower.\n\n"
             "**A Balanced 10-Step Yoga Sequence:**\n"
@@ -342,12 +385,38 @@ def generate_simulated_llm_response(dosha, calories, profile, safe_foods, plan_t
             "9.  **Cool-down (Child's Pose):** 1 minute.\n"
             "10. **Final Relaxation (Savasana):** 5-10 minutes."
         )
+    }
+}
 
-    disclaimer = (
-        "This diet chart is a preliminary suggestion based on the provided data. It is not a substitute for professional "
-        "medical advice. Please consult with a qualified healthcare professional or a certified yoga instructor before "
-        "making significant changes to your diet or lifestyle, especially if you have pre-existing health conditions."
-    )
+DISCLAIMER = (
+    "This diet chart is a preliminary suggestion based on the provided data. It is not a substitute for professional "
+    "medical advice. Please consult with a qualified healthcare professional or a certified yoga instructor before "
+    "making significant changes to your diet or lifestyle, especially if you have pre-existing health conditions."
+)
+
+
+def generate_simulated_llm_response(dosha, calories, profile, safe_foods, plan_type, meal_options=None, rng=random, **kwargs):
+    """
+    MODIFIED: Now accepts and returns a dictionary with all health data.
+    """
+    if meal_options is None:
+        meal_options = build_meal_options(safe_foods)
+
+    meal_plan = []
+    if plan_type == 'weekly':
+        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+        for day in days:
+            day_plan = generate_one_day_meal_plan(safe_foods, dosha, meal_options, rng)
+            for item in day_plan:
+                item['day'] = day
+            meal_plan.extend(day_plan)
+    else: # Default to daily
+        meal_plan = generate_one_day_meal_plan(safe_foods, dosha, meal_options, rng)
+
+    guidance = DOSHA_GUIDANCE.get(dosha, DOSHA_GUIDANCE['Tridoshic'])
+    recommendations = guidance['recommendations']
+    yoga_recommendations = guidance['yoga_sequence']
+    disclaimer = DISCLAIMER
 
     return {
         'profile_summary': profile,
@@ -361,4 +430,59 @@ def generate_simulated_llm_response(dosha, calories, profile, safe_foods, plan_t
         'bmi_category': kwargs.get('bmi_category'),
         'protein_target': kwargs.get('protein_target'),
         'heart_rate': kwargs.get('heart_rate')
-    }
\ No newline at end of file
+    }
+
+
+# --- Batch generation for many patients at once ---
+
+def _patient_rng(seed, index):
+    """Per-patient random source, so results don't depend on grouping or worker count."""
+    return random.Random(f"{seed}:{index}") if seed is not None else random.Random()
+
+
+def _generate_dosha_group(dosha, items, plan_type, seed):
+    """Generates profiles for patients sharing a dominant dosha. items is [(index, form_data, ppg_data)]."""
+    return [
+        (index, build_health_profile(form_data, ppg_data, dosha, plan_type, _patient_rng(seed, index)))
+        for index, form_data, ppg_data in items
+    ]
+
+
+def generate_health_profiles_batch(patients, plan_type='weekly', seed=None, processes=None, chunk_size=64):
+    """
+    Generates health profiles for many patients, e.g. a whole clinic overnight.
+
+    patients is a list of dicts with 'form_data' and optional 'ppg_results'
+    (the layout of the saved patient_diagnosis_<id>.json files). Patients are
+    grouped by dominant dosha so each group shares its food pools and guidance
+    text. With processes > 1 the groups are split into chunks and spread over a
+    process pool. Results are returned in input order; pass seed for
+    reproducible meal plans (the same seed gives the same plans with or
+    without a pool).
+    """
+    groups = {}
+    for index, patient in enumerate(patients):
+        form_data = patient.get('form_data') or {}
+        ppg_data = patient.get('ppg_results') or {}
+        dosha = determine_dominant_dosha(form_data)
+        groups.setdefault(dosha, []).append((index, form_data, ppg_data))
+
+    results = [None] * sum(len(items) for items in groups.values())
+
+    if processes and processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [
+                executor.submit(_generate_dosha_group, dosha, items[start:start + chunk_size], plan_type, seed)
+                for dosha, items in groups.items()
+                for start in range(0, len(items), chunk_size)
+            ]
+            for future in futures:
+                for index, profile in future.result():
+                    results[index] = profile
+    else:
+        for dosha, items in groups.items():
+            for index, profile in _generate_dosha_group(dosha, items, plan_type, seed):
+                results[index] = profile
+
+    return results
+
@@ -0,0 +1,91 @@
+"""
+Benchmark for routing chat messages to intents as the number of intents grows.
+
+    python intent_benchmark.py [--intents 3 30 300 3000] [--keywords 8] [--repeat 2000]
+
+Compares chained substring checks, as get_tool_response used to do (one
+`in` test per keyword, intent after intent), against IntentRouter's single
+trie-shaped regex. Synthetic intents with made-up keywords are added to the
+Personal Diet Tool's own (food search, chart explanation, timetable) and the
+same chat messages are routed through both. The router also reports how
+long compiling its pattern takes.
+"""
+
+import argparse
+import random
+import string
+import time
+
+from personal_diet_tool import create_intent_router
+
+MESSAGES = (
+    "what should I eat for breakfast",
+    "high-protein kapha-friendly breakfast under 300 kcal",
+    "why was cucumber recommended?",
+    "can you make me a daily routine",
+    "hello there",
+)
+
+
+def synthetic_intents(count, keywords, seed=0):
+    """`count` intents with `keywords` random 4-9 letter words each."""
+    rng = random.Random(seed)
+    return {f'synthetic_{i}': [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+                               for _ in range(keywords)]
+            for i in range(count)}
+
+
+def chained_route(intents, text):
+    """Substring checks in order, first intent with a keyword in `text` wins."""
+    text = text.lower()
+    for name, keywords in intents.items():
+        if any(keyword in text for keyword in keywords):
+            return name
+    return None
+
+
+def time_per_message(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in MESSAGES:
+            func(message)
+    return (time.perf_counter() - start) / (repeat * len(MESSAGES))
+
+
+def benchmark(counts=(3, 30, 300, 3000), keywords=8, repeat=2000, seed=0):
+    base = create_intent_router()
+    print(f"Routing {len(MESSAGES)} chat messages, {keywords} keywords per synthetic intent, on top of the "
+          f"diet tool's {len(base)} intents and {len(base.keywords())} keyword and entity words")
+    print(f"  {'intents':>8} {'chained in':>12} {'router':>10} {'compile':>10}")
+    for count in counts:
+        intents = synthetic_intents(count, keywords, seed)
+        # The chained version only knows each intent's keywords, checked intent after intent
+        chained = {name: base.keywords(name) for name in base.intents}
+        chained.update(intents)
+
+        router = create_intent_router()
+        for name, words in intents.items():
+            router.add_intent(name, words, None)
+        start = time.perf_counter()
+        router.pattern
+        compile_time = time.perf_counter() - start
+
+        chained_time = time_per_message(lambda text: chained_route(chained, text), repeat)
+        router_time = time_per_message(router.route, repeat)
+        print(f"  {len(chained):>8} {chained_time * 1e6:9.1f} us {router_time * 1e6:7.1f} us "
+              f"{compile_time * 1e3:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--intents', type=int, nargs='+', default=[3, 30, 300, 3000],
+                        help='numbers of synthetic intents to add')
+    parser.add_argument('--keywords', type=int, default=8, help='keywords per synthetic intent')
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    benchmark(args.intents, args.keywords, args.repeat, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import re
+from collections import namedtuple
+
+# Result of routing one message: the winning intent (or None), its score, the
+# score of every intent that matched, and the entities found, e.g.
+# {'meal': ['breakfast'], 'nutrient': ['protein_g'], 'food': ['paneer']}
+Match = namedtuple('Match', 'text intent score scores entities')
+
+
+def trie_pattern(words):
+    """
+    A regex matching any of `words`, with shared prefixes factored out
+    ('lunch', 'lunches' -> 'lunch(?:es)?'). The regex engine then follows one
+    branch per character instead of trying every word in turn, so matching
+    costs about the same however many words there are.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def pattern(node):
+        ends_here = '' in node
+        branches = [re.escape(char) + pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not ends_here:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if ends_here else group
+
+    return pattern(trie)
+
+
+class IntentRouter:
+    """
+    Routes chat messages to handlers with one compiled regex.
+
+    Every keyword of every intent, and every entity value, goes into a single
+    trie-shaped pattern (see trie_pattern). A message is scanned once; each
+    keyword found adds its weight to its intents' scores (a keyword counts
+    once per message) and each entity value found is collected. The intent
+    with the highest score at or above its min_score wins, earlier intents
+    winning ties, and dispatch() calls its handler.
+    """
+
+    def __init__(self, default=None):
+        self.default = default
+        self._intents = {}
+        self._keywords = {}
+        self._pattern = None
+
+    def add_intent(self, name, keywords, handler, min_score=1.0):
+        """
+        `keywords` is a list of words or phrases, or a {keyword: weight} dict;
+        a plain list weighs each keyword 1.
+        """
+        if not isinstance(keywords, dict):
+            keywords = dict.fromkeys(keywords, 1.0)
+        order = self._intents[name][2] if name in self._intents else len(self._intents)
+        self._intents[name] = (handler, min_score, order)
+        for keyword, weight in keywords.items():
+            self._entry(keyword)['intents'][name] = weight
+        self._pattern = None
+
+    def add_entities(self, kind, values, intent_weights=None):
+        """
+        Collects matches of `values` (words, or a {word: canonical value} dict)
+        as entities of `kind`. `intent_weights` ({intent: weight}) lets an
+        entity also count towards intents, e.g. a food name towards food search.
+        """
+        if not isinstance(values, dict):
+            values = {value: value for value in values}
+        for word, value in values.items():
+            entry = self._entry(word)
+            entry['entities'].append((kind, value))
+            for intent, weight in (intent_weights or {}).items():
+                entry['intents'][intent] = max(entry['intents'].get(intent, 0.0), weight)
+        self._pattern = None
+
+    def _entry(self, word):
+        return self._keywords.setdefault(word.lower(), {'intents': {}, 'entities': []})
+
+    @property
+    def pattern(self):
+        """The combined regex, rebuilt after intents or entities change."""
+        if self._pattern is None:
+            self._pattern = re.compile(r'\b(' + trie_pattern(self._keywords) + r')\b')
+        return self._pattern
+
+    def __len__(self):
+        return len(self._intents)
+
+    def keywords(self, intent=None):
+        """Every keyword and entity word, or only those counting towards `intent`."""
+        return [word for word, entry in self._keywords.items() if intent is None or intent in entry['intents']]
+
+    @property
+    def intents(self):
+        return list(self._intents)
+
+    def route(self, text):
+        """Scores `text` against every intent and returns a Match."""
+        text = text.lower()
+        scores, entities = {}, {}
+        for word in dict.fromkeys(self.pattern.findall(text)):
+            entry = self._keywords[word]
+            for intent, weight in entry['intents'].items():
+                scores[intent] = scores.get(intent, 0.0) + weight
+            for kind, value in entry['entities']:
+                found = entities.setdefault(kind, [])
+                if value not in found:
+                    found.append(value)
+
+        # Only intents with a keyword in the message are looked at
+        best, best_score = None, 0.0
+        for name, score in scores.items():
+            _, min_score, order = self._intents[name]
+            if score < min_score:
+                continue
+            if best is None or score > best_score or (score == best_score and order < self._intents[best][2]):
+                best, best_score = name, score
+        return Match(text, best, best_score, scores, entities)
+
+    def dispatch(self, text, *args):
+        """Routes `text` and returns handler(match, *args) of the winning intent, or of `default`."""
+        match = self.route(text)
+        handler = self._intents[match.intent][0] if match.intent else self.default
+        return handler(match, *args)
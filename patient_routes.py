@@ -0,0 +1,318 @@
+import json
+import time
+
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, Response
+
+from health_analyzer import determine_dominant_dosha
+from recipe_store import RECIPE_FIELDS, project_recipe
+from stores import recipe_store, request_storage, user_directory, diagnosis_metrics
+
+# --- Patient Authentication, Dashboard and Diagnosis Routes ---
+# Part of the 'api' service.
+patient_bp = Blueprint('patient', __name__)
+
+@patient_bp.route('/patient/login', methods=['POST'])
+def patient_login():
+    """Handles the patient login form submission."""
+    user_id = request.form.get('user_id')
+    password = request.form.get('password')
+
+    if user_directory.authenticate('patient', user_id, password):
+        session['user_id'] = user_id
+        session['role'] = 'patient'
+        return redirect(url_for('.patient_dashboard'))
+
+    flash('Invalid credentials. Please try again.', 'error')
+    return redirect(url_for('public.signup'))
+
+@patient_bp.route('/patient/dashboard')
+def patient_dashboard():
+    """Renders the patient's main dashboard page."""
+    if 'user_id' in session and session.get('role') == 'patient':
+        return render_template('patient_dashboard.html')
+    return redirect(url_for('public.signup'))
+
+@patient_bp.route('/patient/self-diagnosis')
+def patient_self_diagnosis():
+    """Renders the self-diagnosis page for the patient."""
+    if 'user_id' in session and session.get('role') == 'patient':
+        return render_template('patient_self_diagnosis.html')
+    return redirect(url_for('public.signup'))
+
+@patient_bp.route('/patient/consult-doctor')
+def patient_consult_doctor():
+    """Renders the page for patients to find and consult doctors."""
+    if 'user_id' in session and session.get('role') == 'patient':
+        doctors = user_directory.by_role('doctor')
+        return render_template('patient_consult_doctor.html', doctors=doctors)
+    return redirect(url_for('public.signup'))
+
+@patient_bp.route('/patient/send-request', methods=['POST'])
+def send_request():
+    """Handles the form submission when a patient sends a consultation request."""
+    if 'user_id' in session and session.get('role') == 'patient':
+        doctor_id = request.form.get('doctor_id')
+        patient_id = session['user_id']
+
+        new_request = {
+            'doctor_id': doctor_id,
+            'patient_id': patient_id,
+            'status': 'pending'
+        }
+
+        request_storage.add(new_request)
+
+        flash('Your request has been sent successfully!', 'success')
+        return redirect(url_for('.patient_consult_doctor'))
+    return redirect(url_for('public.signup'))
+
+
+@patient_bp.route('/patient/profile')
+def patient_profile():
+    """Renders the patient's profile page."""
+    if 'user_id' in session and session.get('role') == 'patient':
+        return render_template('patient_profile.html')
+    return redirect(url_for('public.signup'))
+
+@patient_bp.route('/patient/save-form-data', methods=['POST'])
+def save_form_data():
+    """Saves the detailed form data and determined dosha to a file."""
+    if 'user_id' in session and session.get('role') == 'patient':
+        form_data = request.form.to_dict()
+        dominant_dosha = determine_dominant_dosha(form_data)
+
+        patient_id = session['user_id']
+        # Combine form data with existing PPG data if it exists
+        diagnosis_data = {'form_data': form_data, 'dominant_dosha': dominant_dosha}
+        
+        # Preserve PPG results if they are already in the session
+        if 'ppg_results' in session:
+            diagnosis_data['ppg_results'] = session['ppg_results']
+
+        try:
+            # Save the combined data to a file
+            with open(f'data/patient_diagnosis_{patient_id}.json', 'w') as f:
+                json.dump(diagnosis_data, f, indent=4)
+            diagnosis_metrics.refresh(patient_id)
+        except IOError as e:
+            return jsonify({'status': 'error', 'message': f'Could not save data: {e}'})
+
+        # Update session data
+        session['form_data'] = form_data
+        session['dominant_dosha'] = dominant_dosha
+        session.modified = True
+
+        return jsonify({'status': 'success', 'message': 'Form data saved.'})
+    return jsonify({'status': 'error', 'message': 'User not logged in.'})
+
+@patient_bp.route('/save_complete_diagnosis', methods=['POST'])
+def save_complete_diagnosis():
+    """Saves both form data and PPG results for complete diagnosis."""
+    if 'user_id' not in session or session.get('role') != 'patient':
+        return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
+    
+    try:
+        # Get form data from request
+        form_data = request.get_json()
+        if not form_data:
+            return jsonify({'status': 'error', 'message': 'No form data provided'}), 400
+        
+        print(f"Received form data: {form_data}")  # Debug log
+        
+        # Determine dominant dosha from form
+        try:
+            dominant_dosha = determine_dominant_dosha(form_data)
+            print(f"Determined dosha: {dominant_dosha}")  # Debug log
+        except Exception as e:
+            print(f"Error determining dosha: {e}")
+            dominant_dosha = "Tridoshic"  # Fallback
+        
+        # Get PPG results from session
+        ppg_results = session.get('ppg_results', {})
+        print(f"PPG results: {ppg_results}")  # Debug log
+        
+        # Combine all data
+        diagnosis_data = {
+            'form_data': form_data,
+            'dominant_dosha': dominant_dosha,
+            'ppg_results': ppg_results,
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        
+        # Save to file
+        patient_id = session['user_id']
+        try:
+            with open(f'data/patient_diagnosis_{patient_id}.json', 'w') as f:
+                json.dump(diagnosis_data, f, indent=4)
+            diagnosis_metrics.refresh(patient_id)
+            print(f"Saved diagnosis data to file for patient {patient_id}")  # Debug log
+        except Exception as e:
+            print(f"Error saving to file: {e}")
+            return jsonify({'status': 'error', 'message': f'Error saving to file: {str(e)}'}), 500
+        
+        # Update session
+        session['form_data'] = form_data
+        session['dominant_dosha'] = dominant_dosha
+        session.modified = True
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Complete diagnosis saved successfully',
+            'dominant_dosha': dominant_dosha,
+            'data_count': len(form_data)
+        })
+        
+    except Exception as e:
+        print(f"Error in save_complete_diagnosis: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'status': 'error', 'message': f'Error saving diagnosis: {str(e)}'}), 500
+
+
+# PPG Measurement endpoints
+@patient_bp.route('/start_measurement', methods=['POST'])
+def start_ppg_measurement():
+    """Starts PPG measurement and returns initial status."""
+    if 'user_id' not in session:
+        return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
+    
+    # Initialize PPG measurement session data
+    session['ppg_measuring'] = True
+    session['ppg_start_time'] = time.time()
+    
+    return jsonify({
+        'status': 'success',
+        'message': 'PPG measurement started',
+        'measuring': True
+    })
+
+@patient_bp.route('/stop_measurement', methods=['POST'])
+def stop_ppg_measurement():
+    """Stops PPG measurement and returns simulated results."""
+    if 'user_id' not in session:
+        return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
+    
+    # Simulate PPG analysis results
+    import random
+    
+    # Generate realistic heart rate (60-100 BPM)
+    heart_rate = random.randint(65, 95)
+    
+    # Determine dosha based on heart rate patterns (simplified simulation)
+    if heart_rate < 70:
+        dosha = 'kapha'
+        dosha_description = 'Your pulse indicates a Kapha constitution - steady, slow, and strong. This suggests a calm, stable nature with good endurance.'
+        recommendations = [
+            'Engage in regular, vigorous exercise to boost metabolism',
+            'Eat light, warm, and spicy foods to stimulate digestion',
+            'Maintain an active lifestyle to prevent sluggishness',
+            'Use warming spices like ginger, black pepper, and cinnamon'
+        ]
+    elif heart_rate > 85:
+        dosha = 'vata'
+        dosha_description = 'Your pulse indicates a Vata constitution - quick, irregular, and light. This suggests an active, creative nature that may need grounding.'
+        recommendations = [
+            'Follow a regular daily routine to create stability',
+            'Eat warm, nourishing, and grounding foods',
+            'Practice calming activities like yoga and meditation',
+            'Get adequate rest and avoid overstimulation'
+        ]
+    else:
+        dosha = 'pitta'
+        dosha_description = 'Your pulse indicates a Pitta constitution - strong, regular, and forceful. This suggests a focused, determined nature with good circulation.'
+        recommendations = [
+            'Avoid excessive heat and maintain a cool environment',
+            'Eat cooling, fresh foods and avoid spicy, oily foods',
+            'Practice moderate exercise and stress management',
+            'Stay hydrated and avoid overexertion'
+        ]
+    
+    # Store PPG results in session
+    ppg_results = {
+        'heart_rate': heart_rate,
+        'dosha': dosha,
+        'description': dosha_description,
+        'recommendations': recommendations,
+        'measurement_time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'quality': 'Good' if random.random() > 0.3 else 'Fair'
+    }
+    
+    session['ppg_results'] = ppg_results
+    session['ppg_measuring'] = False
+    
+    return jsonify({
+        'status': 'success',
+        'heart_rate': heart_rate,
+        'dosha': dosha.capitalize(),
+        'description': dosha_description,
+        'recommendations': recommendations,
+        'quality': ppg_results['quality']
+    })
+
+
+@patient_bp.route('/patient/get-recipes')
+def get_recipes():
+    """
+    Fetches recipes suitable for the patient's dominant dosha stored in the session.
+
+    Optional query parameters:
+      offset / limit - return one page of results; 'next_offset' points at the next page
+      fields         - comma separated subset of id,name,ingredients,instructions,properties
+      format=ndjson  - stream one recipe per line instead of a single JSON document
+    """
+    if 'user_id' not in session or session.get('role') != 'patient':
+        return jsonify({'error': 'Not authorized'}), 401
+
+    if 'dominant_dosha' not in session:
+        return jsonify({'error': 'Please complete the self-diagnosis test first.'}), 400
+
+    dominant_dosha = session['dominant_dosha'].lower()
+
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', type=int)
+    if offset < 0 or (limit is not None and limit <= 0):
+        return jsonify({'error': 'offset must be >= 0 and limit must be > 0.'}), 400
+
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()]
+    unknown_fields = [field for field in fields if field not in RECIPE_FIELDS]
+    if unknown_fields:
+        return jsonify({'error': f"Unknown recipe fields: {', '.join(unknown_fields)}"}), 400
+
+    try:
+        page, total, next_offset = recipe_store.recommended_page(dominant_dosha, offset, limit)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return jsonify({'error': 'Recipe database not found.'}), 500
+
+    if request.args.get('format') == 'ndjson':
+        def generate():
+            for recipe in page:
+                yield json.dumps(project_recipe(recipe, fields)) + '\n'
+
+        response = Response(generate(), mimetype='application/x-ndjson')
+        response.headers['X-Recipe-Count'] = str(total)
+        if next_offset is not None:
+            response.headers['X-Next-Offset'] = str(next_offset)
+        return response
+
+    return jsonify({
+        'count': total,
+        'dosha': dominant_dosha.capitalize(),
+        'offset': offset,
+        'next_offset': next_offset,
+        'recipes': [project_recipe(recipe, fields) for recipe in page]
+    })
+
+@patient_bp.route('/patient/recipes/<recipe_id>')
+def get_recipe(recipe_id):
+    """Returns a single recipe with its full instructions, for on-demand loading."""
+    if 'user_id' not in session or session.get('role') != 'patient':
+        return jsonify({'error': 'Not authorized'}), 401
+
+    try:
+        recipe = recipe_store.get(recipe_id)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return jsonify({'error': 'Recipe database not found.'}), 500
+
+    if recipe is None:
+        return jsonify({'error': 'Recipe not found.'}), 404
+    return jsonify(recipe)
@@ -0,0 +1,403 @@
+import time
+
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+
+from health_analyzer import generate_health_profile, determine_dominant_dosha
+
+
+# --- Report Templates ---
+# Core font used for every report. fpdf2 maps 'Arial' to helvetica on each
+# set_font call, so the core name is used directly.
+REPORT_FONT = 'helvetica'
+
+BRAND_COLOR = (34, 139, 34)
+FOOTER_COLOR = (128, 128, 128)
+SECTION_FILL = (200, 220, 200)
+
+# Page layout and section styles per report kind.
+# header: (title, cell height) or None for a bare page without header/footer.
+# title: (font size, fill colour or None, max chars or None, gap after)
+# body: (font size, text colour, line height, gap after or None for one line)
+# break_y: start a new page before a section past this y position (None = never)
+REPORT_TEMPLATES = {
+    'doctor_diet_chart': {
+        'margins': 20,
+        'page_break_margin': 20,
+        'header': ("Vedyura - Doctor's Diet Plan", 10),
+        'title': (12, SECTION_FILL, 80, 4),
+        'body': (10, (0, 0, 0), 5, None),
+        'break_y': 240,
+        'empty_body': 'No information available.',
+    },
+    'diagnosis': {
+        'margins': None,
+        'page_break_margin': 15,
+        'header': ('Vedyura Ayurvedic Healthcare', 15),
+        'title': (14, None, 100, 3),
+        'body': (11, (50, 50, 50), 6, 3),
+        'break_y': None,
+        'empty_body': None,
+    },
+    'diet_chart': {
+        'margins': None,
+        'page_break_margin': 20,
+        'header': ('Vedyura Personalized Health Plan', 10),
+        'title': (12, SECTION_FILL, None, 4),
+        'body': (11, (0, 0, 0), 6, None),
+        'break_y': None,
+        'empty_body': None,
+    },
+    'simple': {
+        'margins': None,
+        'page_break_margin': 20,
+        'header': None,
+        'title': (14, None, None, 3),
+        'body': (12, (0, 0, 0), 8, None),
+        'break_y': None,
+        'empty_body': None,
+    },
+}
+
+# --- Text Sanitisation ---
+# Typographic characters that have a readable latin-1 equivalent. Anything else
+# outside latin-1 becomes '?' (the core PDF fonts only cover latin-1).
+LATIN1_TRANSLATION = str.maketrans({
+    '•': '-',    # bullet point
+    '–': '-',    # en dash
+    '—': '-',    # em dash
+    '‘': "'",    # left single quote
+    '’': "'",    # right single quote
+    '“': '"',    # left double quote
+    '”': '"',    # right double quote
+    '…': '...',  # ellipsis
+})
+
+
+def sanitize_text(text):
+    """Makes any value safe to draw with the core latin-1 PDF fonts."""
+    if not isinstance(text, str):
+        text = str(text)
+    return text.translate(LATIN1_TRANSLATION).encode('latin-1', 'replace').decode('latin-1')
+
+
+def report_date(payload):
+    """
+    The date printed on a report. It comes from the payload, so it is part of
+    the report cache key and a cached PDF never shows an earlier day.
+    """
+    return payload.get('date') or time.strftime('%Y-%m-%d')
+
+
+def pdf_output_bytes(pdf):
+    """Returns the finished document as bytes."""
+    return bytes(pdf.output())
+
+
+class ReportPDF(FPDF):
+    """
+    Shared page layout for all Vedyura reports. The look of a report (header
+    text, margins, section styles) comes from its entry in REPORT_TEMPLATES.
+    """
+
+    def __init__(self, kind):
+        super().__init__()
+        self.template = REPORT_TEMPLATES[kind]
+        if self.template['margins'] is not None:
+            margin = self.template['margins']
+            self.set_margins(margin, margin, margin)
+        self.set_auto_page_break(auto=True, margin=self.template['page_break_margin'])
+        self.add_page()
+
+    def header(self):
+        if not self.template['header']:
+            return
+        title, height = self.template['header']
+        self.set_font(REPORT_FONT, 'B', 16)
+        self.set_text_color(*BRAND_COLOR)
+        self.cell(0, height, sanitize_text(title), new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
+        self.ln(5)
+
+    def footer(self):
+        if not self.template['header']:
+            return
+        self.set_y(-15)
+        self.set_font(REPORT_FONT, 'I', 8)
+        self.set_text_color(*FOOTER_COLOR)
+        self.cell(0, 10, f'Page {self.page_no()}', align='C')
+
+    def _break_if_low(self):
+        break_y = self.template['break_y']
+        if break_y is not None and self.get_y() > break_y:
+            self.add_page()
+
+    def text_line(self, text, height=8, size=12, style='', align='L'):
+        """A single line of text that moves the cursor to the next line."""
+        self.set_font(REPORT_FONT, style, size)
+        self.cell(0, height, sanitize_text(text), new_x=XPos.LMARGIN, new_y=YPos.NEXT, align=align)
+
+    def paragraph(self, text, height=6, size=11, style=''):
+        """Wrapped text starting at the left margin, leaving the cursor below it."""
+        self.set_font(REPORT_FONT, style, size)
+        self.multi_cell(0, height, sanitize_text(text), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    def section_title(self, title):
+        size, fill, max_chars, gap = self.template['title']
+        title = sanitize_text(title)
+        if max_chars:
+            title = title[:max_chars]
+        self._break_if_low()
+        self.set_text_color(0, 0, 0)
+        if fill:
+            self.set_fill_color(*fill)
+        self.set_font(REPORT_FONT, 'B', size)
+        self.cell(0, 8 if fill else 10, title, new_x=XPos.LMARGIN, new_y=YPos.NEXT, fill=bool(fill))
+        self.ln(gap)
+
+    def section_body(self, body):
+        size, color, height, gap = self.template['body']
+        body = sanitize_text(body)
+        if not body.strip() and self.template['empty_body']:
+            body = self.template['empty_body']
+        self._break_if_low()
+        self.set_text_color(*color)
+        self.paragraph(body, height=height, size=size)
+        self.ln(gap)
+
+
+# --- Report Content ---
+DOCTOR_DISCLAIMER = 'This diet chart is a recommendation based on the information provided. Please consult with your doctor for any further questions.'
+
+DIAGNOSIS_DISCLAIMER = 'This analysis is for educational purposes only and should not replace professional medical advice. Please consult with a qualified healthcare provider for any health concerns.'
+
+DOSHA_DESCRIPTIONS = {
+    'Vata': 'Vata governs movement and is associated with air and space elements. People with dominant Vata tend to be energetic, creative, and quick-thinking, but may experience anxiety and irregular digestion.',
+    'Pitta': 'Pitta governs transformation and is associated with fire and water elements. People with dominant Pitta tend to be focused, ambitious, and have strong digestion, but may experience anger and inflammation.',
+    'Kapha': 'Kapha governs structure and is associated with earth and water elements. People with dominant Kapha tend to be calm, stable, and have strong immunity, but may experience sluggishness and weight gain.'
+}
+
+DOSHA_RECOMMENDATIONS = {
+    'Vata': (
+        'Follow a regular daily routine',
+        'Eat warm, cooked, and nourishing foods',
+        'Practice calming activities like yoga and meditation',
+        'Get adequate sleep and rest',
+        'Use warming spices like ginger and cinnamon'
+    ),
+    'Pitta': (
+        'Avoid excessive heat and sun exposure',
+        'Choose cool, fresh, and sweet foods',
+        'Engage in moderate, cooling exercises',
+        'Practice stress management techniques',
+        'Use cooling herbs like coconut and mint'
+    ),
+    'Kapha': (
+        'Stay active and avoid excessive sleep',
+        'Eat light, warm, and spicy foods',
+        'Engage in vigorous, energizing exercise',
+        'Avoid heavy, oily, and sweet foods',
+        'Use stimulating spices like black pepper and ginger'
+    )
+}
+
+LIFESTYLE_TIPS = {
+    'Vata': 'Maintain regularity in meals, sleep, and daily activities. Stay warm and avoid cold, dry environments.',
+    'Pitta': 'Keep cool and avoid overheating. Practice moderation in all activities and avoid excessive competition.',
+    'Kapha': 'Stay active and energized. Avoid sedentary lifestyle and heavy, rich foods.'
+}
+
+SIMPLE_DESCRIPTIONS = {
+    'Vata': 'Air and Space elements. Energetic and creative nature. Tends to be quick-thinking but may experience anxiety.',
+    'Pitta': 'Fire and Water elements. Focused and ambitious nature. Strong digestion but may experience anger.',
+    'Kapha': 'Earth and Water elements. Calm and stable nature. Strong immunity but may experience sluggishness.'
+}
+
+SIMPLE_RECOMMENDATIONS = {
+    'Vata': '- Follow regular routines\n- Eat warm, nourishing foods\n- Practice calming activities\n- Get adequate rest',
+    'Pitta': '- Stay cool and avoid overheating\n- Eat fresh, cooling foods\n- Practice moderation\n- Manage stress effectively',
+    'Kapha': '- Stay active and energized\n- Eat light, spicy foods\n- Engage in vigorous exercise\n- Avoid heavy foods'
+}
+
+
+# --- Report Renderers ---
+def render_doctor_diet_chart(payload):
+    """Renders the diet plan a doctor writes for one of their patients."""
+    patient_info = payload['patient_info']
+    meal_plan = payload['meal_plan']
+    professional_advice = payload.get('professional_advice')
+
+    pdf = ReportPDF('doctor_diet_chart')
+    pdf.section_title(f"Diet Plan for {patient_info['name']}")
+
+    for meal, details in meal_plan.items():
+        pdf.set_text_color(0, 0, 0)
+        pdf.text_line(str(meal)[:50], size=11, style='B')  # Limit meal name length
+        pdf.section_body(f"Items: {str(details.get('items', 'No items specified'))[:200]}")
+        pdf.section_body(f"Advice: {str(details.get('advice', 'No advice provided'))[:300]}")
+        pdf.ln(2)
+
+    pdf.section_title('Professional Advice')
+    pdf.section_body(str(professional_advice or 'No additional advice provided.')[:500])
+
+    pdf.section_title('Disclaimer')
+    pdf.section_body(DOCTOR_DISCLAIMER)
+
+    return pdf_output_bytes(pdf)
+
+
+def render_diagnosis_report(payload):
+    """Renders the full dosha analysis report for a patient's questionnaire and pulse results."""
+    form_data = payload['form_data']
+    ppg_results = payload.get('ppg_results') or {}
+
+    # Determine dominant dosha
+    try:
+        dominant_dosha = determine_dominant_dosha(form_data)
+    except Exception as e:
+        print(f"Error determining dosha: {e}")
+        dominant_dosha = "Tridoshic"  # Default fallback
+
+    pdf = ReportPDF('diagnosis')
+
+    # Title and patient info
+    pdf.text_line('Vedyura Dosha Analysis Report', height=15, size=20, style='B', align='C')
+    pdf.ln(10)
+    pdf.text_line(f'Patient ID: {payload["patient_id"]}', size=12, style='B')
+    pdf.text_line(f'Date: {report_date(payload)}', size=12, style='B')
+    pdf.ln(5)
+
+    pdf.section_title('Dominant Dosha Analysis')
+    pdf.section_body(f'Your dominant dosha is: {dominant_dosha}')
+    pdf.section_body(DOSHA_DESCRIPTIONS.get(dominant_dosha, 'Unknown dosha type.'))
+
+    # PPG Analysis Section (if available)
+    if ppg_results:
+        pdf.section_title('Pulse Analysis (Nadi Pariksha)')
+        pdf.section_body(f'Heart Rate: {ppg_results.get("heart_rate", "N/A")} BPM')
+        pdf.section_body(f'Pulse-based Dosha: {ppg_results.get("dosha", "N/A").capitalize()}')
+        if ppg_results.get('description'):
+            pdf.section_body(ppg_results['description'])
+
+    # Assessment Responses (limited to prevent overflow)
+    pdf.section_title('Assessment Summary')
+    answered = [(key, value) for key, value in form_data.items() if value][:10]
+    for key, value in answered:
+        formatted_key = key.replace('_', ' ').title()
+        pdf.section_body(f'{formatted_key}: {str(value)[:100]}')  # Limit value length
+
+    pdf.section_title('Personalized Recommendations')
+    for i, recommendation in enumerate(DOSHA_RECOMMENDATIONS.get(dominant_dosha, ()), 1):
+        pdf.section_body(f'{i}. {recommendation}')
+
+    # PPG Recommendations (if available)
+    if ppg_results and ppg_results.get('recommendations'):
+        pdf.section_title('Pulse-Based Recommendations')
+        for i, rec in enumerate(ppg_results['recommendations'], 1):
+            pdf.section_body(f'{i}. {rec}')
+
+    pdf.section_title('Lifestyle Guidelines')
+    pdf.section_body(LIFESTYLE_TIPS.get(dominant_dosha, 'Follow general Ayurvedic principles.'))
+
+    pdf.section_title('Important Disclaimer')
+    pdf.section_body(DIAGNOSIS_DISCLAIMER)
+
+    return pdf_output_bytes(pdf)
+
+
+def render_diet_chart(payload):
+    """
+    Renders the patient's diet chart, including the detailed
+    Ayurvedic pulse analysis from the PPG model.
+    """
+    form_data = payload['form_data']
+    ppg_results = payload.get('ppg_results') or {}
+
+    # This function from health_analyzer.py should ideally combine form and PPG data
+    health_profile = generate_health_profile(form_data, ppg_results)
+
+    pdf = ReportPDF('diet_chart')
+
+    # Section 1: General Health Profile
+    pdf.section_title('Your Health Profile Summary')
+    pdf.section_body(health_profile.get('profile_summary', 'Summary not available.'))
+
+    # Section 2: Key Health Metrics
+    pdf.section_title('Key Health Metrics')
+    metrics_text = (
+        f"Body Mass Index (BMI): {health_profile.get('bmi_value', 'N/A')} ({health_profile.get('bmi_category', 'N/A')})\n"
+        f"Resting Heart Rate (from PPG): {ppg_results.get('heart_rate', 'N/A')} BPM\n"
+        f"Estimated Daily Protein Intake: {health_profile.get('protein_target', 'N/A')}"
+    )
+    pdf.section_body(metrics_text)
+
+    # Section 3: Ayurvedic Pulse Analysis
+    if ppg_results and 'dosha' in ppg_results:
+        pdf.section_title('Ayurvedic Pulse Analysis (Nadi Pariksha)')
+
+        dosha_name = ppg_results.get('dosha', 'N/A').capitalize()
+        pulse_description = ppg_results.get('description', 'No analysis available.')
+        pdf.section_body(f"**Pulse-Based Dosha:** {dosha_name}\n\n{pulse_description}")
+
+        # Add the specific recommendations from the PPG analysis
+        pdf.text_line("Recommendations based on your Pulse:", size=11, style='B')
+        pdf.ln(2)
+        for rec in ppg_results.get('recommendations', []):
+            pdf.paragraph(f'- {rec}', size=11)
+        pdf.ln(4)
+
+    # Section 4: Meal Plan
+    plan_title = 'Your Daily Meal Plan'
+    if health_profile.get('plan_type') == 'weekly':
+        plan_title = 'Your Weekly Meal Plan'
+    pdf.section_title(f"{plan_title} (Approx. Target: {health_profile.get('calories', 'N/A')} kcal per day)")
+
+    for meal_item in health_profile.get('meal_plan', []):
+        meal_name = meal_item.get('meal', 'N/A')
+        food_description = meal_item.get('food', 'N/A')
+        pdf.section_body(f"**{meal_name}:** {food_description}")
+
+    # Section 5: General Lifestyle Recommendations
+    pdf.section_title('Personalized Lifestyle Recommendations')
+    pdf.section_body(health_profile.get('recommendations', 'No recommendations available.'))
+
+    # Section 6: Disclaimer
+    pdf.section_title('Disclaimer')
+    pdf.paragraph(health_profile.get('disclaimer', 'Standard disclaimer.'), height=5, size=9, style='I')
+
+    return pdf_output_bytes(pdf)
+
+
+def render_simple_report(payload):
+    """Renders the short one-page dosha analysis."""
+    form_data = payload.get('form_data') or {}
+
+    dominant_dosha = determine_dominant_dosha(form_data) if form_data else "Tridoshic"
+    print(f"Determined dosha: {dominant_dosha}")
+
+    pdf = ReportPDF('simple')
+
+    pdf.text_line('Vedyura Dosha Analysis', height=15, size=20, style='B', align='C')
+    pdf.ln(10)
+
+    pdf.text_line(f'Patient ID: {payload["patient_id"]}', height=10)
+    pdf.text_line(f'Date: {report_date(payload)}', height=10)
+    pdf.text_line(f'Dominant Dosha: {dominant_dosha}', height=10)
+    pdf.ln(10)
+
+    description = SIMPLE_DESCRIPTIONS.get(dominant_dosha, 'Balanced constitution with mixed characteristics.')
+    pdf.section_body(f'Description: {description}')
+    pdf.ln(5)
+
+    pdf.section_title('Basic Recommendations:')
+    pdf.section_body(SIMPLE_RECOMMENDATIONS.get(dominant_dosha, '- Maintain balance in all aspects\n- Eat seasonal foods\n- Listen to your body\n- Practice mindfulness'))
+
+    return pdf_output_bytes(pdf)
+
+
+# Report kinds that can be rendered (and queued) by name
+REPORT_RENDERERS = {
+    'diet_chart': render_diet_chart,
+    'diagnosis': render_diagnosis_report,
+    'doctor_diet_chart': render_doctor_diet_chart,
+    'simple': render_simple_report,
+}
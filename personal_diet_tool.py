@@ -1,4 +1,11 @@
 import json
+import os
+from collections import namedtuple
+
+from food_search import DOSHAS, MEAL_WORDS, NUTRIENT_WORDS, FoodIndex, parse_food_query
+from health_analyzer import MEAL_KEYWORDS
+from intent_router import IntentRouter
+from response_cache import ResponseCache, normalize_message
 
 # --- Load Food Database ---
 try:
@@ -7,67 +14,96 @@ try:
 except (FileNotFoundError, json.JSONDecodeError):
     FOOD_DATA = []
 
-def get_tool_response(user_id, msg, session_data):
+# Indexed once here, so a search never scans FOOD_DATA. Meals use the same
+# name keywords as the meal plan.
+FOOD_INDEX = FoodIndex(FOOD_DATA, MEAL_KEYWORDS)
+FOOD_SEARCH_LIMIT = 5
+
+# --- User Context & Response Cache ---
+# The parts of a user's profile that answers depend on. It is also the cache
+# fingerprint: two users with the same context get the same answers.
+ChatContext = namedtuple('ChatContext', 'dosha goal allergies')
+
+# Answers keyed by (normalized message, ChatContext); every handler is deterministic
+RESPONSE_CACHE = ResponseCache(max_entries=int(os.environ.get('VEDYURA_CHAT_CACHE_SIZE', 1024)),
+                               ttl=float(os.environ.get('VEDYURA_CHAT_CACHE_TTL', 600)))
+
+def chat_context(diagnosis_data):
     """
-    Manages the logic for the Personal Diet Tool, providing intelligent responses
-    based on the user's profile and query.
+    Builds the ChatContext from a saved diagnosis, or from session data of the
+    same shape (form_data, dominant_dosha, ppg_results).
     """
-    msg_lower = msg.lower()
+    form_data = diagnosis_data.get('form_data') or {}
+    return ChatContext(
+        dosha=user_dosha(diagnosis_data),
+        goal=form_data.get('health_goal') or None,
+        allergies=form_data.get('allergies') or None,
+    )
 
-    # --- Function 1: Intelligent Food Search (Placeholder) ---
-    if "food" in msg_lower or "eat" in msg_lower or "vegetable" in msg_lower or "fruit" in msg_lower:
-        return handle_food_search(msg_lower, session_data)
+def get_tool_response(user_id, msg, context):
+    """
+    Manages the logic for the Personal Diet Tool, providing intelligent responses
+    based on the user's profile (a ChatContext) and query. INTENT_ROUTER (set up
+    at the end of this module) picks the handler; answers are cached.
+    """
+    key = (normalize_message(msg), context)
+    return RESPONSE_CACHE.get_or_compute(key, lambda: INTENT_ROUTER.dispatch(msg, context))
 
-    # --- Function 2: Diet Chart Explanation (Placeholder) ---
-    elif "why" in msg_lower and ("recommend" in msg_lower or "chart" in msg_lower):
-        return handle_chart_explanation(msg_lower, session_data)
+def handle_greeting(match, context):
+    return "Hello! I am your Personal Diet Tool. You can ask me for food recommendations, explanations about your diet chart, or for a personalized daily routine."
 
-    # --- Function 3: Personalized Timetable (Placeholder) ---
-    elif "routine" in msg_lower or "schedule" in msg_lower or "timetable" in msg_lower:
-        return handle_timetable_request(session_data)
-        
-    # --- Default Greeting ---
-    else:
-        return "Hello! I am your Personal Diet Tool. You can ask me for food recommendations, explanations about your diet chart, or for a personalized daily routine."
+def user_dosha(diagnosis_data):
+    """The user's dosha ('vata', 'pitta' or 'kapha') from the diagnosis or PPG scan, or None."""
+    for dosha in (diagnosis_data.get('dominant_dosha'), (diagnosis_data.get('ppg_results') or {}).get('dosha')):
+        if dosha and dosha.lower() in DOSHAS:
+            return dosha.lower()
+    return None
 
-def handle_food_search(msg, session_data):
+def handle_food_search(match, context):
     """
-    Provides personalized food recommendations.
-    This is a placeholder and would be replaced with a sophisticated search.
+    Provides personalized food recommendations from FOOD_INDEX. The query's own
+    dosha ("kapha-friendly") wins over the user's; nutrient limits, qualifiers
+    ("high-protein") and tastes ("spicy") narrow the results.
     """
-    # In a real implementation, this would use the user's dosha, goals, and region
-    # from session_data to filter FOOD_DATA.
-    
-    # Simple keyword matching for this placeholder:
-    if "breakfast" in msg:
-        return "For a high-protein breakfast, consider Moong Dal Chilla or a Spinach and Paneer Omelette."
-    elif "lunch" in msg:
-        return "For lunch, a balanced meal of Roti, a seasonal Sabzi, and a bowl of Dal is a great option for you."
-    else:
-        # Example of a filtered search (simplified)
-        pitta_friendly_foods = [food['food_name'] for food in FOOD_DATA if food.get('ayurvedic_properties', {}).get('pitta') == 'Decrease'][:3]
-        return f"Based on your profile, here are some good food options for you: {', '.join(pitta_friendly_foods)}."
+    query = parse_food_query(match.text)
+    query['dosha'] = query['dosha'] or context.dosha
+    foods = FOOD_INDEX.search(limit=FOOD_SEARCH_LIMIT, **query)
+    if not foods:
+        return "I couldn't find foods matching all of that. Try fewer limits, e.g. 'high-protein foods under 300 kcal'."
+
+    # Only meals the index knows are searched; the answer does not claim others
+    meal = f" for {query['meal']}" if query['meal'] in FOOD_INDEX.meals else ""
+    fit = f" that suit {query['dosha'].capitalize()}" if query['dosha'] else ""
+    # Formatted as a [table] for chatbot.js, like the timetable
+    rows = '\n'.join(f"{food['food_name']} | {food.get('energy_kcal', 0):.0f} | {food.get('protein_g', 0):.1f} | "
+                     f"{food.get('fibre_g', 0):.1f}" for food in foods)
+    return (f"Here are some good options{meal}{fit}:\n"
+            "[table]\n"
+            "Food | kcal | Protein (g) | Fibre (g)\n"
+            "---|---|---|---\n"
+            f"{rows}\n"
+            "[/table]")
 
-def handle_chart_explanation(msg, session_data):
+def handle_chart_explanation(match, context):
     """
     Explains the reasoning behind a food recommendation in the diet chart.
     This is a placeholder.
     """
-    # Simple keyword matching for this placeholder:
-    if "cucumber" in msg:
+    foods = match.entities.get('food', ())
+    if "cucumber" in foods:
         return "Cucumber was recommended because it is very hydrating and low in calories. From an Ayurvedic perspective, it is a cooling food, which is excellent for balancing a Pitta dosha."
-    elif "rice" in msg:
+    elif "rice" in foods:
         return "Boiled rice is recommended as it's easy to digest and provides sustained energy. Ayurvedically, its sweet taste helps to ground Vata and cool Pitta."
     else:
         return "Please ask about a specific food in your chart, for example: 'Why was cucumber recommended?'"
 
-def handle_timetable_request(session_data):
+def handle_timetable_request(match, context):
     """
     Generates and formats a personalized daily routine.
     This is a placeholder.
     """
     # In a real implementation, this timetable would be dynamically generated
-    # based on the user's dosha and lifestyle from session_data.
+    # based on the user's dosha and lifestyle from the context.
     
     # We will format the response as a simple table for chatbot.js to parse.
     response = (
@@ -85,3 +121,31 @@ def handle_timetable_request(session_data):
         "[/table]"
     )
     return response
+
+# --- Intent Routing ---
+def create_intent_router():
+    """
+    The Personal Diet Tool's intents and entities. Intents are scored in one
+    pass over the message; ties go to the intent added first.
+    """
+    router = IntentRouter(default=handle_greeting)
+
+    # Function 1: Intelligent Food Search
+    router.add_intent('food_search', ('food', 'foods', 'eat', 'eating', 'vegetable', 'vegetables', 'fruit', 'fruits',
+                                      'meal', 'meals', 'friendly', 'options'), handle_food_search, min_score=0.5)
+
+    # Function 2: Diet Chart Explanation, needs "why"/"explain" plus what to explain
+    router.add_intent('chart_explanation', {'why': 2, 'explain': 2, 'recommend': 1, 'recommended': 1,
+                                            'recommendation': 1, 'chart': 1}, handle_chart_explanation, min_score=3)
+
+    # Function 3: Personalized Timetable
+    router.add_intent('timetable', ('routine', 'schedule', 'timetable', 'dinacharya'), handle_timetable_request)
+
+    # Entities; meals and nutrients count as asking for food, a food name alone half as much
+    router.add_entities('meal', MEAL_WORDS, {'food_search': 1})
+    router.add_entities('nutrient', NUTRIENT_WORDS, {'food_search': 1})
+    router.add_entities('dosha', DOSHAS)
+    router.add_entities('food', FOOD_INDEX.vocabulary(), {'food_search': 0.5})
+    return router
+
+INTENT_ROUTER = create_intent_router()
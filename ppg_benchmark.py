@@ -0,0 +1,274 @@
+"""
+Benchmarks for the PPG signal path on synthetic signals with known heart rates.
+
+    python ppg_benchmark.py signal [--trials 200] [--jitter 0.3] [--drop-rate 0.05] [--motion 0.0]
+    python ppg_benchmark.py pipeline [--trials 5] [--motion 0.0] [--video clip.mp4 --bpm 72]
+
+Compares the original path (green channel, band-pass designed on every call,
+FFT over the raw samples with an averaged fs) against the current one (cached
+filter design, resampling to a uniform grid first) for each rPPG method,
+reporting BPM error and latency. --motion adds the shared intensity changes
+that head movement and lighting cause, which CHROM and POS are meant to cancel.
+It also replays each trace through the live estimator as /ppg/live polls it,
+showing how often the UI would stop early and how accurate that reading is.
+
+`pipeline` replays whole videos through the frame pipeline (see ppg_replay):
+synthetic faces with a known heart rate by default, or a recording whose
+reference heart rate is given with --bpm. It reports frames/sec, per-stage
+latency and BPM error for each rPPG method. Neither command needs a camera.
+A drawn face is not found by the Haar cascade, so synthetic replays use the
+clip's oracle detector and their "detection" stage is tracking-only; the cost
+of the real cascade on the same frames is timed separately. Replays of
+--video run the real cascade end to end.
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+from scipy import signal
+
+from face_tracker import DETECT_EVERY, DETECT_SCALE
+from ppg_pipeline import FACE_CASCADE, load_cascade
+from ppg_replay import SyntheticFaceVideo, replay, video_frames
+from ppg_signal import (
+    HEART_RATE_BAND, RESAMPLE_FS, RPPG_METHODS, StreamingHeartRateEstimator, calculate_heart_rate_advanced,
+    design_bandpass, estimate_heart_rate,
+)
+
+# Mean forehead colour (R, G, B) and the blood-volume pulse signature, i.e. the
+# relative pulse strength per channel after normalising by skin tone
+SKIN_TONE = np.array([170.0, 120.0, 95.0])
+PULSE_SIGNATURE = np.array([0.33, 0.77, 0.53])
+# Pulse amplitude as a fraction of the skin colour
+PULSE_AMPLITUDE = 0.005
+# How the UI uses /ppg/live (static/js/ppg.js): polled about twice a second,
+# stopping early once stable but not before MIN_MEASUREMENT_DURATION
+LIVE_POLL_SECONDS = 0.5
+LIVE_MIN_SECONDS = 10
+
+
+def synthetic_trace(bpm, seconds=25, fps=30, jitter=0.3, drop_rate=0.05, noise=0.1, motion=0.0, rng=None):
+    """
+    Forehead RGB trace of a pulse at `bpm` as a webcam would record it: frame
+    times jitter by up to `jitter` of a frame interval, a `drop_rate` share of
+    frames is lost, and Gaussian sensor noise and slow lighting drift are added.
+    `motion` scales random intensity changes shared by all channels (head
+    movement, flicker). Returns (timestamps, rgb).
+    """
+    rng = rng or np.random.default_rng()
+    interval = 1.0 / fps
+    timestamps = np.arange(0, seconds, interval)
+    timestamps = timestamps + rng.uniform(-jitter, jitter, len(timestamps)) * interval
+    timestamps = np.sort(timestamps[rng.random(len(timestamps)) >= drop_rate])
+
+    f = bpm / 60.0
+    pulse = np.sin(2 * np.pi * f * timestamps) + 0.3 * np.sin(4 * np.pi * f * timestamps + 0.5)
+    drift = 0.015 * np.sin(2 * np.pi * 0.05 * timestamps)
+    # Band-limited random intensity changes, in the same band as the pulse
+    shake = np.convolve(rng.normal(0, 1, len(timestamps)), np.hanning(9), mode='same')
+    intensity = 1 + drift + motion * 0.01 * shake
+
+    rgb = SKIN_TONE * (intensity[:, None] + PULSE_AMPLITUDE * PULSE_SIGNATURE * pulse[:, None])
+    rgb += rng.normal(0, noise, rgb.shape)
+    return timestamps + 1.7e9, rgb
+
+
+def legacy_heart_rate(timestamps, rgb):
+    """The original stop-measurement path: green channel, averaged fs, per-call filter design, no resampling."""
+    values = rgb[:, 1]
+    fs_est = 1.0 / np.mean(np.diff(timestamps))
+    if len(values) < fs_est * 2:
+        return 0
+    detrended = signal.detrend(values)
+    nyq = 0.5 * fs_est
+    b, a = signal.butter(5, [HEART_RATE_BAND[0] / nyq, HEART_RATE_BAND[1] / nyq], btype='band')
+    filtered = signal.filtfilt(b, a, detrended)
+
+    yf = np.fft.fft(filtered)
+    xf = np.fft.fftfreq(len(filtered), 1 / fs_est)
+    mask = (xf > HEART_RATE_BAND[0]) & (xf < HEART_RATE_BAND[1])
+    if not mask.any():
+        return 0
+    hr_fft = xf[mask][np.argmax(np.abs(yf[mask]))] * 60
+
+    peaks, _ = signal.find_peaks(filtered, distance=fs_est / 2.5)
+    if len(peaks) < 2:
+        return hr_fft
+    hr_peaks = 60 / (np.mean(np.diff(peaks)) / fs_est)
+    heart_rate = (hr_fft + hr_peaks) / 2
+    return heart_rate if 40 < heart_rate < 180 else 0
+
+
+def time_call(func, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def summarize(errors, latencies):
+    errors = np.asarray(errors)
+    return (
+        f"MAE {np.mean(errors):6.2f} BPM | p95 {np.percentile(errors, 95):6.2f} BPM | "
+        f"within 5 BPM {np.mean(errors <= 5) * 100:5.1f}% | {np.mean(latencies) * 1e3:6.2f} ms/call"
+    )
+
+
+def live_run(timestamps, rgb, method):
+    """
+    Feeds a trace to a StreamingHeartRateEstimator the way /ppg/live polls
+    it. Returns (final bpm, bpm when the UI would have stopped early or None).
+    """
+    estimator = StreamingHeartRateEstimator(method=method)
+    early = None
+    start = 0
+    while start < len(timestamps):
+        end = np.searchsorted(timestamps, timestamps[start] + LIVE_POLL_SECONDS)
+        result = estimator.update(rgb[start:end], timestamps[start:end])
+        if early is None and result['stable'] and timestamps[end - 1] - timestamps[0] >= LIVE_MIN_SECONDS:
+            early = result['bpm']
+        start = end
+    return estimator.result()['bpm'], early
+
+
+def benchmark_signal(trials=200, jitter=0.3, drop_rate=0.05, noise=0.1, motion=0.0, seed=0):
+    """Runs every heart-rate path over `trials` synthetic traces and prints accuracy and latency."""
+    rng = np.random.default_rng(seed)
+    paths = {'legacy': legacy_heart_rate}
+    for method in RPPG_METHODS:
+        paths[method] = lambda timestamps, rgb, method=method: estimate_heart_rate(timestamps, rgb, method=method)
+    results = {name: ([], []) for name in paths}
+    live = {method: ([], [], []) for method in RPPG_METHODS}
+
+    for _ in range(trials):
+        bpm = rng.uniform(50, 120)
+        timestamps, rgb = synthetic_trace(bpm, jitter=jitter, drop_rate=drop_rate, noise=noise,
+                                          motion=motion, rng=rng)
+        for method, (errors, early_errors, latencies) in live.items():
+            (final, early), latency = time_call(live_run, timestamps, rgb, method)
+            errors.append(abs(final - bpm) if final else bpm)
+            if early is not None:
+                early_errors.append(abs(early - bpm))
+            latencies.append(latency)
+        for name, func in paths.items():
+            estimate, latency = time_call(func, timestamps, rgb)
+            results[name][0].append(abs(estimate - bpm) if estimate else bpm)
+            results[name][1].append(latency)
+
+    print(f"Heart-rate estimation, {trials} traces of 25 s (jitter {jitter:.0%} of a frame, "
+          f"{drop_rate:.0%} dropped frames, noise {noise}, motion {motion})")
+    for name, (errors, latencies) in results.items():
+        print(f"  {name:<10} {summarize(errors, latencies)}")
+
+    print(f"Live estimate (/ppg/live polled every {LIVE_POLL_SECONDS} s; early stop once stable after "
+          f"{LIVE_MIN_SECONDS} s)")
+    for method, (errors, early_errors, latencies) in live.items():
+        errors = np.asarray(errors)
+        early = (f"{np.mean(np.asarray(early_errors) <= 5) * 100:5.1f}% of them within 5 BPM"
+                 if early_errors else "")
+        print(f"  {method:<10} final within 5 BPM {np.mean(errors <= 5) * 100:5.1f}% | "
+              f"early stop in {len(early_errors)}/{trials} traces {early} | "
+              f"{np.mean(latencies) * 1e3:6.2f} ms/trace")
+
+    design_bandpass.cache_clear()
+    _, uncached = time_call(signal.butter, 5, HEART_RATE_BAND, 'bandpass', False, 'sos', RESAMPLE_FS, repeat=200)
+    design_bandpass(5, HEART_RATE_BAND[0], HEART_RATE_BAND[1], RESAMPLE_FS)
+    _, cached = time_call(design_bandpass, 5, HEART_RATE_BAND[0], HEART_RATE_BAND[1], RESAMPLE_FS, repeat=200)
+    print(f"Filter design: {uncached * 1e6:.1f} us per butter() call, {cached * 1e6:.2f} us from the cache")
+
+    samples = np.random.default_rng(seed).normal(size=int(25 * RESAMPLE_FS))
+    _, latency = time_call(calculate_heart_rate_advanced, samples, RESAMPLE_FS, repeat=50)
+    print(f"calculate_heart_rate_advanced on {len(samples)} uniform samples: {latency * 1e3:.2f} ms")
+
+
+def haar_detection_cost(clip, frames=60):
+    """
+    Mean seconds per detectMultiScale call of the real face cascade on the
+    first `frames` frames of `clip`, downscaled as FaceTracker does. The cascade
+    scans every window whether or not it finds a face, so this is close to
+    what a detection costs on a real face of the same frame size.
+    """
+    cascade = load_cascade(FACE_CASCADE)
+    elapsed, count = 0.0, 0
+    for _, frame in clip:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, None, fx=DETECT_SCALE, fy=DETECT_SCALE, interpolation=cv2.INTER_AREA)
+        start = time.perf_counter()
+        cascade.detectMultiScale(small, 1.1, 4)
+        elapsed += time.perf_counter() - start
+        count += 1
+        if count == frames:
+            break
+    return elapsed / count
+
+
+def benchmark_pipeline(trials=5, motion=0.0, video=None, bpm=None, seed=0):
+    """
+    Replays `trials` synthetic face videos (or the recording `video`, whose
+    true heart rate is `bpm`) once per rPPG method and prints throughput,
+    per-stage latency and BPM error.
+    """
+    rng = np.random.default_rng(seed)
+    if video is not None:
+        runs = [(bpm, lambda method: replay(video_frames(video), method=method))]
+        source = f"{video} (reference {bpm} BPM), real Haar face cascade"
+        detection = 'detection'
+    else:
+        runs, clips = [], []
+        for trial in range(trials):
+            clip = SyntheticFaceVideo(rng.uniform(50, 120), motion=motion, seed=seed + trial)
+            clips.append(clip)
+            runs.append((clip.bpm, lambda method, clip=clip: replay(clip, method=method, detector=clip)))
+        source = f"{trials} synthetic 25 s face videos at 30 fps (motion {motion} px), oracle face detector"
+        detection = 'detection (tracking only)'
+
+    print(f"Frame pipeline replay, {source}")
+    for method in RPPG_METHODS:
+        fps, stages, errors = [], {}, []
+        for true_bpm, run in runs:
+            result = run(method)
+            fps.append(result['fps'])
+            for stage, ms in result['stages'].items():
+                stages.setdefault(detection if stage == 'detection' else stage, []).append(ms)
+            if true_bpm is not None:
+                errors.append(abs(result['heart_rate'] - true_bpm) if result['heart_rate'] else true_bpm)
+        latency = ', '.join(f"{stage} {np.mean(values):.2f}" for stage, values in stages.items())
+        error = f" | MAE {np.mean(errors):6.2f} BPM" if errors else ""
+        print(f"  {method:<6} {np.mean(fps):7.1f} frames/sec | ms: {latency}{error}")
+
+    if video is None:
+        cost = np.mean([haar_detection_cost(clip) for clip in clips])
+        print(f"Real Haar face cascade on the same frames (scale {DETECT_SCALE}): {cost * 1e3:.2f} ms per detection, "
+              f"run at least every {DETECT_EVERY} frames (>= {cost * 1e3 / DETECT_EVERY:.2f} ms/frame on top of tracking)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    signal_parser = subparsers.add_parser('signal', help='heart-rate accuracy and latency on synthetic traces')
+    signal_parser.add_argument('--trials', type=int, default=200)
+    signal_parser.add_argument('--jitter', type=float, default=0.3, help='frame time jitter, as a fraction of a frame interval')
+    signal_parser.add_argument('--drop-rate', type=float, default=0.05)
+    signal_parser.add_argument('--noise', type=float, default=0.1, help='sensor noise on each channel mean')
+    signal_parser.add_argument('--motion', type=float, default=0.0, help='strength of shared intensity changes')
+    signal_parser.add_argument('--seed', type=int, default=0)
+
+    pipeline_parser = subparsers.add_parser('pipeline', help='frames/sec, stage latency and BPM error of video replays')
+    pipeline_parser.add_argument('--trials', type=int, default=5)
+    pipeline_parser.add_argument('--motion', type=float, default=0.0, help='head sway of the synthetic face, in pixels')
+    pipeline_parser.add_argument('--video', help='replay this recording instead of synthetic faces')
+    pipeline_parser.add_argument('--bpm', type=float, help='reference heart rate of --video')
+    pipeline_parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == 'signal':
+        benchmark_signal(args.trials, args.jitter, args.drop_rate, args.noise, args.motion, args.seed)
+    elif args.command == 'pipeline':
+        benchmark_pipeline(args.trials, args.motion, args.video, args.bpm, args.seed)
+
+
+if __name__ == "__main__":
+    main()
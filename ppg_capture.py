@@ -0,0 +1,321 @@
+import threading
+import time
+
+# OpenCV is imported inside the functions that use it, so importing this module
+# (for CameraBroker and the preview defaults) stays cheap until a camera is used.
+
+# Defaults for the /video_feed preview; sampling always runs at the camera rate
+PREVIEW_FPS = 10
+PREVIEW_JPEG_QUALITY = 70
+# Preview frames are downsized to this width before encoding (never upscaled)
+PREVIEW_WIDTH = 320
+# Quality never drops below this while adapting to a slow client
+PREVIEW_MIN_QUALITY = 30
+# Seconds the camera stays open after its last subscriber leaves
+CAMERA_IDLE_TIMEOUT = 60
+# A session's capture stops when neither a preview reader nor an HTTP request
+# from its user has been seen for this many seconds
+CAPTURE_IDLE_TIMEOUT = 15
+
+
+class CameraBroker:
+    """
+    Owns the camera device and shares its frames with every subscriber.
+
+    The device is opened when the first subscriber acquires it. Each frame read
+    is published with a sequence number and a timestamp, and subscribers pick
+    it up with next_frame(), so any number of FrameCaptures (one per PPG
+    session) and preview streams read the same device. When the last
+    subscriber releases it, the device stays open and warm for `idle_timeout`
+    seconds, grabbing frames without decoding them. A scan started within that
+    window gets frames immediately instead of waiting for the device to open.
+
+    Published frames are shared: subscribers must copy a frame before drawing on it.
+    """
+
+    def __init__(self, camera_index=0, idle_timeout=CAMERA_IDLE_TIMEOUT):
+        self.camera_index = camera_index
+        self.idle_timeout = idle_timeout
+        self.error = None
+        self._lock = threading.Lock()
+        self._frame_ready = threading.Condition(self._lock)
+        self._thread = None
+        self._subscribers = 0
+        self._idle_since = None
+        self._closed = False
+        self._latest = None
+        self._timestamp = None
+        self._sequence = 0
+
+    @property
+    def subscribers(self):
+        return self._subscribers
+
+    @property
+    def running(self):
+        with self._lock:
+            return self._thread is not None
+
+    def acquire(self):
+        """Registers a subscriber, opening the device if it is not already open."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Camera broker is closed.")
+            self._subscribers += 1
+            self._idle_since = None
+            if self._thread is None:
+                self.error = None
+                self._thread = threading.Thread(target=self._run, name='camera-broker', daemon=True)
+                self._thread.start()
+
+    def release(self):
+        """Unregisters a subscriber. The device closes after idle_timeout without subscribers."""
+        with self._lock:
+            self._subscribers = max(self._subscribers - 1, 0)
+            if self._subscribers == 0:
+                self._idle_since = time.monotonic()
+
+    def close(self, timeout=2.0):
+        """Releases the device now, whatever the subscriber count. Used at shutdown."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+            self._frame_ready.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def next_frame(self, after=0, timeout=0.5):
+        """
+        Waits until a frame newer than sequence number `after` is published.
+        Returns (sequence, frame, timestamp), or (after, None, None) on timeout
+        or when the device stops.
+        """
+        with self._frame_ready:
+            self._frame_ready.wait_for(
+                lambda: self._sequence > after or self._thread is None or self._closed, timeout)
+            if self._sequence > after:
+                return self._sequence, self._latest, self._timestamp
+            return after, None, None
+
+    def _idle_expired(self):
+        """Caller must hold the lock."""
+        if self._closed:
+            return True
+        return (self._subscribers == 0 and self._idle_since is not None
+                and time.monotonic() - self._idle_since >= self.idle_timeout)
+
+    def _run(self):
+        import cv2
+
+        while True:
+            camera = cv2.VideoCapture(self.camera_index)
+            try:
+                if not camera.isOpened():
+                    self.error = "Cannot open camera."
+                    print(f"Error: {self.error}")
+                else:
+                    print(f"Camera {self.camera_index} opened.")
+                while self.error is None:
+                    with self._lock:
+                        if self._idle_expired():
+                            break
+                        idle = self._subscribers == 0
+                    if idle:
+                        # Keep the device streaming without paying for decoding
+                        if not camera.grab():
+                            self.error = "Failed to grab a frame."
+                            break
+                        continue
+                    success, frame = camera.read()
+                    if not success:
+                        self.error = "Failed to grab a frame."
+                        print(f"Error: {self.error}")
+                        break
+                    with self._frame_ready:
+                        self._latest = frame
+                        self._timestamp = time.time()
+                        self._sequence += 1
+                        self._frame_ready.notify_all()
+            finally:
+                camera.release()
+                print(f"Camera {self.camera_index} released.")
+
+            # Deciding to exit and clearing _thread happen under one lock: an
+            # acquire() either comes first and gets the device reopened, or
+            # finds no thread and starts a new one
+            with self._frame_ready:
+                if self.error is not None or self._closed or self._subscribers == 0:
+                    self._thread = None
+                    self._latest = None
+                    self._frame_ready.notify_all()
+                    return
+
+
+class FrameCapture(threading.Thread):
+    """
+    Runs process_frame(frame, ppg, timestamp) on every camera frame for one
+    PPG session, which pushes ROI means into the session's signal buffer.
+    Frames come from the shared CameraBroker, so opening a session's capture
+    never waits for the device when it is already warm. The latest annotated
+    frame is kept for preview streams, which read it at their own pace, so a
+    slow client never throttles sampling.
+
+    If processing falls behind the camera, older frames are skipped and the
+    newest one is processed.
+
+    The loop stops by itself once nobody is watching: no preview read and no
+    request touching the session for idle_timeout seconds (the tab was
+    closed). A measurement running past MAX_MEASUREMENT_SECONDS is stopped.
+    """
+
+    def __init__(self, ppg, process_frame, broker, idle_timeout=CAPTURE_IDLE_TIMEOUT):
+        super().__init__(name=f'ppg-capture-{ppg.session_id}', daemon=True)
+        self.ppg = ppg
+        self.process_frame = process_frame
+        self.broker = broker
+        self.idle_timeout = idle_timeout
+        self.error = None
+        self.last_read = time.time()
+        self._stop_event = threading.Event()
+        self._frame_ready = threading.Condition()
+        self._latest = None
+        self._sequence = 0
+
+    @property
+    def running(self):
+        return self.is_alive() and not self._stop_event.is_set()
+
+    def stop(self, timeout=2.0):
+        """Asks the capture loop to exit and waits briefly for it to unsubscribe."""
+        self._stop_event.set()
+        with self._frame_ready:
+            self._frame_ready.notify_all()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self):
+        self.broker.acquire()
+        try:
+            camera_sequence = 0
+            while not self._stop_event.is_set():
+                if time.time() - max(self.last_read, self.ppg.last_active) > self.idle_timeout:
+                    print(f"PPG session {self.ppg.session_id}: no preview or requests for "
+                          f"{self.idle_timeout:.0f} s, stopping capture.")
+                    self.ppg.stop()
+                    break
+                self.ppg.expire()
+                camera_sequence, frame, timestamp = self.broker.next_frame(after=camera_sequence)
+                if frame is None:
+                    if self.broker.error is not None:
+                        self.error = self.broker.error
+                        break
+                    continue
+                annotated = self.process_frame(frame.copy(), self.ppg, timestamp)
+                with self._frame_ready:
+                    self._latest = annotated
+                    self._sequence += 1
+                    self._frame_ready.notify_all()
+        finally:
+            self.broker.release()
+            self._stop_event.set()
+            with self._frame_ready:
+                self._frame_ready.notify_all()
+            print(f"Capture stopped for PPG session {self.ppg.session_id}.")
+
+    def latest_frame(self, after=0, timeout=1.0):
+        """
+        Waits until a frame newer than sequence number `after` is available.
+        Returns (sequence, frame), or (after, None) on timeout or shutdown.
+        Counts as the session being watched (see idle_timeout).
+        """
+        self.last_read = time.time()
+        with self._frame_ready:
+            self._frame_ready.wait_for(
+                lambda: self._sequence > after or self._stop_event.is_set(), timeout)
+            if self._sequence > after:
+                return self._sequence, self._latest
+            return after, None
+
+
+class PreviewEncoder:
+    """
+    JPEG encoder for preview frames. Frames wider than `width` are downsized
+    (INTER_AREA) into a buffer that is reused while the frame size stays the
+    same, then encoded.
+
+    Quality adapts to the client: slower() lowers it in steps down to
+    `min_quality` when frames cannot be sent in time, and faster() raises it
+    back towards the requested `quality` once they can.
+    """
+
+    def __init__(self, width=PREVIEW_WIDTH, quality=PREVIEW_JPEG_QUALITY, min_quality=PREVIEW_MIN_QUALITY):
+        self.width = width
+        self.max_quality = quality
+        self.min_quality = min(min_quality, quality)
+        self.quality = quality
+        self._resized = None
+
+    def slower(self):
+        self.quality = max(self.min_quality, self.quality - 10)
+
+    def faster(self):
+        self.quality = min(self.max_quality, self.quality + 2)
+
+    def resize(self, frame):
+        import cv2
+
+        height, width = frame.shape[:2]
+        if width <= self.width:
+            return frame
+        size = (self.width, max(1, round(height * self.width / width)))
+        dst = self._resized
+        if dst is not None and (dst.shape != (size[1], size[0]) + frame.shape[2:] or dst.dtype != frame.dtype):
+            dst = None
+        self._resized = cv2.resize(frame, size, dst=dst, interpolation=cv2.INTER_AREA)
+        return self._resized
+
+    def encode(self, frame):
+        """Returns the JPEG bytes of the downsized frame, or None if encoding fails."""
+        import cv2
+
+        ret, buffer = cv2.imencode('.jpg', self.resize(frame), [int(cv2.IMWRITE_JPEG_QUALITY), int(self.quality)])
+        return buffer.tobytes() if ret else None
+
+
+def mjpeg_stream(capture, fps=PREVIEW_FPS, quality=PREVIEW_JPEG_QUALITY, width=PREVIEW_WIDTH):
+    """
+    Yields multipart MJPEG parts of the capture's latest annotated frame, at
+    most `fps` times per second and at most `width` pixels wide. Frames
+    produced in between are skipped, and JPEG quality drops while the client
+    falls behind (see PreviewEncoder).
+    """
+    interval = 1.0 / fps
+    encoder = PreviewEncoder(width, quality)
+    sequence = 0
+    next_send = time.monotonic()
+
+    while True:
+        sequence, frame = capture.latest_frame(after=sequence)
+        if frame is None:
+            if not capture.running:
+                break
+            continue
+
+        started = time.monotonic()
+        jpeg = encoder.encode(frame)
+        if jpeg is not None:
+            yield (b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n' % len(jpeg)
+                   + jpeg + b'\r\n')
+        # Encoding plus handing the part to the client took longer than a frame
+        # interval: the client is behind, so send smaller frames until it catches up
+        if time.monotonic() - started > interval:
+            encoder.slower()
+        else:
+            encoder.faster()
+
+        next_send += interval
+        delay = next_send - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_send = time.monotonic()
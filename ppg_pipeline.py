@@ -0,0 +1,94 @@
+import time
+from functools import lru_cache
+
+import cv2
+
+from face_tracker import FaceTracker
+
+# --- Face and eye cascade classifiers ---
+FACE_CASCADE = 'haarcascade_frontalface_default.xml'
+EYE_CASCADE = 'haarcascade_eye.xml'
+
+
+@lru_cache(maxsize=None)
+def load_cascade(filename):
+    """Builds one of OpenCV's bundled Haar cascades on first use; later calls share it."""
+    return cv2.CascadeClassifier(cv2.data.haarcascades + filename)
+
+
+def _record(timings, stage, start):
+    """Adds the time since `start` to timings[stage] when timings are being collected."""
+    now = time.perf_counter()
+    if timings is not None:
+        timings.setdefault(stage, []).append(now - start)
+    return now
+
+
+def detect_liveness(ppg, face_roi):
+    """Detects liveness by checking for eye blinks."""
+    # Eyes sit in the upper half of the face box; searching only there halves the work
+    eyes = load_cascade(EYE_CASCADE).detectMultiScale(face_roi[:face_roi.shape[0] // 2], 1.1, 4)
+    if len(eyes) == 0: # If no eyes are detected, could be a blink
+        if not ppg.blink_detected:
+            ppg.blink_detected = True
+            ppg.blink_start_time = time.time()
+        elif time.time() - ppg.blink_start_time > 0.1: # Check if "blink" is of reasonable duration
+             return True # Liveness confirmed
+    else:
+        ppg.blink_detected = False
+    return False
+
+def process_frame_advanced(frame, ppg, timestamp=None, timings=None):
+    """
+    Processes each frame for face detection, liveness check, and PPG signal extraction.
+    If a `timings` dict is passed, per-stage durations (seconds) are appended to it.
+    """
+    start = time.perf_counter()
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if ppg.face_tracker is None:
+        ppg.face_tracker = FaceTracker(load_cascade(FACE_CASCADE))
+    faces = ppg.face_tracker.update(gray)
+    start = _record(timings, 'detection', start)
+
+    if not ppg.liveness_passed:
+        for (x, y, w, h) in faces:
+            roi_gray = gray[y:y+h, x:x+w]
+            if detect_liveness(ppg, roi_gray):
+                ppg.liveness_passed = True
+                break # Exit after first liveness confirmation
+        start = _record(timings, 'liveness', start)
+
+    if ppg.liveness_passed:
+        for (x, y, w, h) in faces:
+            cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
+            forehead_roi = frame[y+h//10 : y+h//4, x+w//4 : x+3*w//4]
+            if forehead_roi.size > 0 and ppg.measuring:
+                b, g, r, _ = cv2.mean(forehead_roi)
+                ppg.add_sample(r, g, b, timestamp)
+        _record(timings, 'roi_extraction', start)
+    elif len(faces) > 0:
+         for (x, y, w, h) in faces:
+            cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 0, 255), 2)
+
+    return frame
+
+def analyze_ayurvedic_profile(heart_rate):
+    """Provides detailed Ayurvedic dosha analysis based on heart rate."""
+    if 50 <= heart_rate < 70:
+        dosha = 'kapha'
+        description = "Your heart rate suggests a Kapha dominant constitution, characterized by a steady and strong pulse. You likely have good stamina and a calm nature."
+        recs = ['Engage in regular, vigorous exercise.', 'Favor warm, light, and dry foods.', 'Incorporate stimulating spices like ginger and black pepper.']
+    elif 70 <= heart_rate < 85:
+        dosha = 'pitta'
+        description = "Your heart rate indicates a Pitta dominant constitution, with a moderate and sharp pulse. You are likely intelligent, focused, and have strong digestion."
+        recs = ['Engage in calming activities like swimming or walking in nature.', 'Favor cooling, sweet, and bitter foods.', 'Avoid excessive heat and spicy foods.']
+    elif 85 <= heart_rate <= 100:
+        dosha = 'vata'
+        description = "Your heart rate points to a Vata dominant constitution, which can be quick and variable. You are likely creative, energetic, and quick-thinking."
+        recs = ['Establish a regular daily routine.', 'Favor warm, moist, and grounding foods.', 'Practice calming exercises like yoga and meditation.']
+    else:
+        dosha = 'undetermined'
+        description = 'Your heart rate is outside the typical resting ranges for dosha analysis. Please ensure you are fully rested and try again.'
+        recs = ['Consult a professional for a detailed analysis.']
+        
+    return {'dosha': dosha, 'description': description, 'recommendations': recs, 'heart_rate': int(heart_rate)}
@@ -0,0 +1,174 @@
+"""
+Offline replay of the PPG pipeline, without a webcam.
+
+    python ppg_replay.py recording.mp4 [--method pos] [--require-liveness]
+
+Frames from a recorded video, or from SyntheticFaceVideo with a known heart
+rate, go through the same steps as a live measurement: process_frame_advanced
+(face detection / tracking, liveness, forehead ROI means), preview encoding of
+the annotated frame, then estimate_heart_rate and analyze_ayurvedic_profile.
+Each stage is timed; see ppg_benchmark.py for the benchmark built on top of
+this.
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from face_tracker import FaceTracker
+from ppg_capture import PREVIEW_JPEG_QUALITY, PREVIEW_WIDTH, PreviewEncoder
+from ppg_pipeline import analyze_ayurvedic_profile, process_frame_advanced
+from ppg_session import PPGSession
+from ppg_signal import RPPG_METHODS, estimate_heart_rate
+
+# Skin colour (B, G, R) of the synthetic face and the relative pulse strength
+# per channel, in the same order
+SYNTHETIC_SKIN_BGR = np.array([95.0, 120.0, 170.0])
+SYNTHETIC_PULSE_BGR = np.array([0.53, 0.77, 0.33])
+SYNTHETIC_BACKGROUND = 40
+
+
+def video_frames(path):
+    """Yields (timestamp_seconds, frame) for every frame of a video file."""
+    video = cv2.VideoCapture(path)
+    if not video.isOpened():
+        raise IOError(f"Cannot open video: {path}")
+    fps = video.get(cv2.CAP_PROP_FPS) or 30.0
+    index = 0
+    try:
+        while True:
+            success, frame = video.read()
+            if not success:
+                break
+            yield index / fps, frame
+            index += 1
+    finally:
+        video.release()
+
+
+class SyntheticFaceVideo:
+    """
+    Frames of a textured, skin-coloured face whose colour pulses at `bpm`, as
+    (timestamp, frame) pairs. `motion` is the amplitude in pixels of a slow
+    head sway, which also shades the face slightly as it moves.
+
+    A drawn face is not something a Haar cascade will find, so the video also
+    acts as its own face detector: pass it as `detector` to replay() and
+    detectMultiScale returns the true face box. Tracking still runs on the
+    rendered pixels.
+    """
+
+    def __init__(self, bpm, seconds=25, fps=30, size=(320, 240), motion=0.0, amplitude=0.005, noise=2.0,
+                 seed=0):
+        self.bpm = bpm
+        self.seconds = seconds
+        self.fps = fps
+        self.width, self.height = size
+        self.motion = motion
+        self.amplitude = amplitude
+        self.noise = noise
+        self.seed = seed
+
+        self.face_w, self.face_h = self.width * 2 // 5, self.height * 3 // 5
+        rng = np.random.default_rng(seed)
+        texture = cv2.GaussianBlur(rng.normal(1.0, 0.08, (self.face_h, self.face_w)), (7, 7), 0)
+        self._texture = texture[:, :, None]
+        self._box = self._face_box(0.0)
+
+    def __len__(self):
+        return int(self.seconds * self.fps)
+
+    def _face_box(self, sway):
+        x = int(round((self.width - self.face_w) / 2 + sway))
+        y = int(round((self.height - self.face_h) / 3 + 0.5 * sway))
+        return x, y, self.face_w, self.face_h
+
+    def __iter__(self):
+        rng = np.random.default_rng(self.seed + 1)
+        f = self.bpm / 60.0
+        for i in range(len(self)):
+            t = i / self.fps
+            pulse = np.sin(2 * np.pi * f * t) + 0.3 * np.sin(4 * np.pi * f * t + 0.5)
+            sway = self.motion * np.sin(2 * np.pi * 0.3 * t)
+            shade = 1.0 + 0.002 * sway
+            colour = SYNTHETIC_SKIN_BGR * (shade + self.amplitude * SYNTHETIC_PULSE_BGR * pulse)
+
+            face = self._texture * colour + rng.normal(0, self.noise, (self.face_h, self.face_w, 3))
+            frame = np.full((self.height, self.width, 3), SYNTHETIC_BACKGROUND, dtype=np.uint8)
+            x, y, w, h = self._box = self._face_box(sway)
+            frame[y:y + h, x:x + w] = np.clip(face, 0, 255).astype(np.uint8)
+            yield t, frame
+
+    def detectMultiScale(self, image, *args, **kwargs):
+        """Oracle detector: the current face box, scaled to `image`."""
+        scale = image.shape[1] / self.width
+        x, y, w, h = self._box
+        return np.array([[int(x * scale), int(y * scale), int(w * scale), int(h * scale)]])
+
+
+def replay(frames, method='green', detector=None, encode_quality=PREVIEW_JPEG_QUALITY, encode_width=PREVIEW_WIDTH,
+           require_liveness=False):
+    """
+    Runs (timestamp, frame) pairs through the PPG pipeline of one session and
+    returns the heart rate, profile, frames/sec and mean per-stage latency in
+    ms. `detector` replaces the Haar face cascade (see SyntheticFaceVideo).
+    Liveness is skipped unless `require_liveness`, since a blink check on a
+    recording only tests the recording.
+
+    The session keeps the last MEASUREMENT_SECONDS of samples, like a live one.
+    """
+    ppg = PPGSession('replay')
+    ppg.start(method=method)
+    if detector is not None:
+        ppg.face_tracker = FaceTracker(detector)
+    if not require_liveness:
+        ppg.liveness_passed = True
+
+    timings = {}
+    encoder = PreviewEncoder(encode_width, encode_quality)
+    count = 0
+    start = time.perf_counter()
+    for timestamp, frame in frames:
+        annotated = process_frame_advanced(frame, ppg, timestamp, timings)
+        encode_start = time.perf_counter()
+        encoder.encode(annotated)
+        timings.setdefault('encoding', []).append(time.perf_counter() - encode_start)
+        count += 1
+    elapsed = time.perf_counter() - start
+    ppg.stop()
+
+    rgb, timestamps = ppg.samples()
+    estimate_start = time.perf_counter()
+    heart_rate = estimate_heart_rate(timestamps, rgb, method=method) if len(rgb) else 0
+    timings['hr_estimation'] = [time.perf_counter() - estimate_start]
+
+    return {
+        'frames': count,
+        'samples': len(rgb),
+        'fps': count / elapsed if elapsed > 0 else 0.0,
+        'stages': {stage: float(np.mean(values)) * 1e3 for stage, values in timings.items()},
+        'heart_rate': float(heart_rate),
+        'profile': analyze_ayurvedic_profile(heart_rate) if heart_rate > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('video', help='recorded video file')
+    parser.add_argument('--method', choices=RPPG_METHODS, default='green')
+    parser.add_argument('--require-liveness', action='store_true', help='only sample once a blink has been seen')
+    args = parser.parse_args()
+
+    result = replay(video_frames(args.video), method=args.method, require_liveness=args.require_liveness)
+    print(f"{result['frames']} frames, {result['samples']} samples, {result['fps']:.1f} frames/sec")
+    for stage, ms in result['stages'].items():
+        print(f"  {stage:<15} {ms:8.2f} ms")
+    print(f"Heart rate: {result['heart_rate']:.1f} BPM")
+    if result['profile']:
+        print(f"Dosha: {result['profile']['dosha']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import atexit
+import importlib
+import os
+import time
+import uuid
+
+from flask import Blueprint, request, session, jsonify, Response
+
+# ppg_signal, ppg_pipeline and face_tracker need OpenCV or SciPy and are
+# imported where they are first used; see startup_benchmark.py.
+from ppg_session import PPGSessionManager, PPG_MODES
+from ppg_capture import (
+    CameraBroker, FrameCapture, mjpeg_stream, CAMERA_IDLE_TIMEOUT, PREVIEW_FPS as DEFAULT_PREVIEW_FPS,
+    PREVIEW_JPEG_QUALITY, PREVIEW_WIDTH as DEFAULT_PREVIEW_WIDTH, CAPTURE_IDLE_TIMEOUT as DEFAULT_CAPTURE_IDLE_TIMEOUT,
+)
+
+# --- PPG Measurement Routes ---
+# Camera capture, the video preview and heart-rate analysis. CPU-heavy; part
+# of the 'compute' service.
+ppg_bp = Blueprint('ppg', __name__)
+
+# --- Per-session PPG state ---
+# Each browser session gets its own PPGSession (signal buffers, liveness state
+# and camera), so concurrent measurements never mix their samples.
+ppg_sessions = PPGSessionManager()
+
+# One broker owns the camera and shares its frames with every session's
+# capture thread. It keeps the device open for a while after the last scan so
+# the next one starts without waiting for the camera to open.
+camera_broker = CameraBroker(
+    int(os.environ.get('VEDYURA_CAMERA_INDEX', 0)),
+    idle_timeout=float(os.environ.get('VEDYURA_CAMERA_IDLE_TIMEOUT', CAMERA_IDLE_TIMEOUT)),
+)
+atexit.register(camera_broker.close)
+
+# Camera frames are sampled on a capture thread at the camera rate; the
+# /video_feed preview only re-encodes the latest frame at this rate, quality
+# and width. Clients can ask for less (or more, up to the limits below) with
+# ?fps=&quality=&width= query parameters.
+PREVIEW_FPS = float(os.environ.get('VEDYURA_PREVIEW_FPS', DEFAULT_PREVIEW_FPS))
+PREVIEW_QUALITY = int(os.environ.get('VEDYURA_PREVIEW_QUALITY', PREVIEW_JPEG_QUALITY))
+PREVIEW_WIDTH = int(os.environ.get('VEDYURA_PREVIEW_WIDTH', DEFAULT_PREVIEW_WIDTH))
+PREVIEW_LIMITS = {'fps': (1, 30), 'quality': (20, 95), 'width': (80, 1280)}
+
+# Full face detection runs every N frames; the face box is tracked in between
+FACE_DETECT_EVERY = int(os.environ.get('VEDYURA_FACE_DETECT_EVERY', 10))
+
+# rPPG method used when a measurement doesn't ask for one: 'green', 'chrom' or 'pos'
+DEFAULT_RPPG_METHOD = os.environ.get('VEDYURA_RPPG_METHOD', 'green')
+
+# Largest batch accepted from a browser computing the ROI means itself (client mode)
+MAX_SAMPLE_BATCH = 600
+
+# Client mode trusts the browser's colour means: there is no face detection or
+# liveness check behind them. It is off unless VEDYURA_PPG_CLIENT_MODE=1.
+CLIENT_MODE_ENABLED = os.environ.get('VEDYURA_PPG_CLIENT_MODE') == '1'
+
+def preload_ppg():
+    """Loads OpenCV, SciPy and the cascades now rather than on the first scan."""
+    importlib.import_module('ppg_signal')
+    ppg_pipeline = importlib.import_module('ppg_pipeline')
+    ppg_pipeline.load_cascade(ppg_pipeline.FACE_CASCADE)
+    ppg_pipeline.load_cascade(ppg_pipeline.EYE_CASCADE)
+
+# Set VEDYURA_PRELOAD_PPG=1 on hosts with a camera to load the PPG stack at startup
+if os.environ.get('VEDYURA_PRELOAD_PPG') == '1':
+    preload_ppg()
+
+
+def current_ppg_session():
+    """Returns the PPGSession for the current browser session, creating it on first use."""
+    if 'ppg_session_id' not in session:
+        session['ppg_session_id'] = uuid.uuid4().hex
+    return ppg_sessions.get_or_create(session['ppg_session_id'])
+
+# Capture stops once the user's tab stops reading the preview and polling
+CAPTURE_IDLE_TIMEOUT = float(os.environ.get('VEDYURA_CAPTURE_IDLE_TIMEOUT', DEFAULT_CAPTURE_IDLE_TIMEOUT))
+
+def ensure_capture(ppg):
+    """Starts the session's camera capture thread unless it is already running."""
+    from face_tracker import FaceTracker
+    from ppg_pipeline import FACE_CASCADE, load_cascade, process_frame_advanced
+
+    if ppg.face_tracker is None:
+        ppg.face_tracker = FaceTracker(load_cascade(FACE_CASCADE), detect_every=FACE_DETECT_EVERY)
+    if ppg.capture is None or not ppg.capture.running:
+        ppg.capture = FrameCapture(ppg, process_frame_advanced, camera_broker, idle_timeout=CAPTURE_IDLE_TIMEOUT)
+        ppg.capture.start()
+    return ppg.capture
+
+def preview_param(name, default, type):
+    """Reads a /video_feed query parameter, clamped to PREVIEW_LIMITS; invalid values fall back to the default."""
+    low, high = PREVIEW_LIMITS[name]
+    return min(max(request.args.get(name, default, type=type), low), high)
+
+@ppg_bp.route('/video_feed')
+def video_feed():
+    capture = ensure_capture(current_ppg_session())
+    fps = preview_param('fps', PREVIEW_FPS, int)
+    quality = preview_param('quality', PREVIEW_QUALITY, int)
+    width = preview_param('width', PREVIEW_WIDTH, int)
+    return Response(mjpeg_stream(capture, fps=fps, quality=quality, width=width),
+                    mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@ppg_bp.route('/ppg/start', methods=['POST'])
+@ppg_bp.route('/start_measurement', methods=['POST'])
+def start_measurement_advanced():
+    """
+    Starts the PPG measurement process. JSON body {"mode": "client"} skips the
+    server camera; the browser then posts colour samples to /ppg/samples.
+    Client mode is refused unless CLIENT_MODE_ENABLED.
+    {"method": "pos" | "chrom" | "green"} picks how the pulse is extracted.
+    """
+    from ppg_signal import RPPG_METHODS
+
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode', 'server')
+    method = data.get('method', DEFAULT_RPPG_METHOD)
+    if mode not in PPG_MODES:
+        return jsonify({'status': 'error', 'message': f'Unknown mode: {mode}'}), 400
+    if mode == 'client' and not CLIENT_MODE_ENABLED:
+        return jsonify({'status': 'error', 'message': 'Client mode is disabled on this server.'}), 403
+    if method not in RPPG_METHODS:
+        return jsonify({'status': 'error', 'message': f'Unknown method: {method}'}), 400
+
+    ppg = current_ppg_session()
+    ppg.start(mode, method)
+    if mode == 'server':
+        ensure_capture(ppg)
+    print(f"Advanced measurement started in {mode} mode with {method} ({ppg_sessions.active_count()} active).")
+    return jsonify({'status': 'success', 'message': 'Measurement started.', 'mode': mode, 'method': method})
+
+@ppg_bp.route('/ppg/samples', methods=['POST'])
+def ingest_ppg_samples():
+    """
+    Receives a batch of forehead colour means computed in the browser:
+    {"samples": [[timestamp_seconds, red, green, blue], ...]}.
+    """
+    ppg = ppg_sessions.get(session.get('ppg_session_id'))
+    if ppg is not None:
+        ppg.touch()
+        ppg.expire()
+    if ppg is None or not ppg.measuring or ppg.mode != 'client':
+        return jsonify({'status': 'error', 'message': 'No client-mode measurement in progress.'}), 409
+
+    samples = (request.get_json(silent=True) or {}).get('samples')
+    if not isinstance(samples, list) or len(samples) > MAX_SAMPLE_BATCH:
+        return jsonify({'status': 'error', 'message': f'Expected a list of at most {MAX_SAMPLE_BATCH} samples.'}), 400
+    try:
+        received = ppg.add_samples(samples)
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    return jsonify({'status': 'success', 'received': received, 'total': len(ppg)})
+
+@ppg_bp.route('/ppg/live')
+def live_ppg_estimate():
+    """
+    Returns the live heart-rate estimate for the current measurement. The UI
+    polls this and may stop early once 'stable' is true.
+    """
+    ppg = ppg_sessions.get(session.get('ppg_session_id'))
+    if ppg is not None:
+        ppg.touch()
+        ppg.expire()
+    if ppg is None or not ppg.measuring:
+        return jsonify({'status': 'error', 'message': 'No measurement in progress.'}), 409
+
+    estimate = ppg.live_estimate()
+    return jsonify({'status': 'success', 'elapsed': round(time.time() - ppg.started_at, 1), **estimate})
+
+@ppg_bp.route('/ppg/stop', methods=['POST'])
+@ppg_bp.route('/stop_measurement', methods=['POST'])
+def stop_measurement_advanced():
+    """Stops the measurement and processes the collected PPG data."""
+    from ppg_pipeline import analyze_ayurvedic_profile
+    from ppg_signal import estimate_heart_rate
+
+    ppg = current_ppg_session()
+    ppg.stop()
+    rgb, timestamps = ppg.samples()
+    print(f"Measurement stopped. Collected {len(rgb)} data points.")
+
+    # Stop the session's capture and forget the session; the samples are already
+    # copied. The broker keeps the camera warm for the next scan.
+    ppg_sessions.close(ppg.session_id)
+
+    if len(rgb) < 60: # Need at least ~2 seconds of data
+        message = "Could not get a clear reading. Please ensure your face is well-lit and stable."
+        session['ppg_results'] = {'error': message}
+        session.modified = True
+        return jsonify({'status': 'error', 'message': message})
+
+    # Samples are resampled to a uniform rate first, as frame timing jitters;
+    # the pulse is then extracted with the measurement's rPPG method.
+    heart_rate = estimate_heart_rate(timestamps, rgb, method=ppg.method)
+
+    if heart_rate == 0:
+        message = "Heart rate calculation failed. Try again in a brighter, more stable environment."
+        session['ppg_results'] = {'error': message}
+        session.modified = True
+        return jsonify({'status': 'error', 'message': message})
+
+    # Get the detailed Ayurvedic analysis
+    ayurvedic_results = analyze_ayurvedic_profile(heart_rate)
+    
+    # Store results in session for other parts of the app to use
+    session['ppg_results'] = ayurvedic_results
+    session.modified = True
+    print(f"Processing complete. Heart Rate: {ayurvedic_results['heart_rate']} BPM, Dosha: {ayurvedic_results['dosha']}")
+
+    return jsonify({'status': 'success', **ayurvedic_results})
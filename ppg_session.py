@@ -0,0 +1,260 @@
+import threading
+import time
+
+import numpy as np
+
+# Length of one PPG measurement (matches the countdown in static/js/ppg.js)
+MEASUREMENT_SECONDS = 25
+# A measurement still running after this long is stopped, e.g. when the tab
+# was closed without /ppg/stop
+MAX_MEASUREMENT_SECONDS = 120
+# Highest frame rate we expect from a webcam; sizes the ring buffers
+MAX_CAMERA_FPS = 60
+
+# 'server': frames come from the camera attached to this server (see ppg_capture)
+# 'client': the browser computes forehead RGB means and posts them in batches
+PPG_MODES = ('server', 'client')
+
+
+class PPGSession:
+    """
+    Signal buffers, liveness state and camera capture for one user's PPG
+    measurement.
+
+    Samples (mean R, G, B of the forehead ROI plus a timestamp) go into
+    preallocated ring buffers sized for the measurement window, so memory stays
+    flat however long a session runs. The oldest samples are overwritten once
+    the window is full.
+
+    Samples arrive one frame at a time from the server-side capture thread, or
+    in batches computed by the browser (mode 'client', see add_samples).
+
+    Lifecycle: 'idle' -> start() -> 'measuring' -> stop() -> 'stopped'.
+    close() stops the capture thread (unsubscribing it from the camera) and can
+    be called from any state.
+
+    last_active is only moved by the user's HTTP requests (touch()), never by
+    samples from the capture thread, so an abandoned session goes idle.
+    """
+
+    def __init__(self, session_id, window_seconds=MEASUREMENT_SECONDS, max_fps=MAX_CAMERA_FPS):
+        self.session_id = session_id
+        self.capacity = int(window_seconds * max_fps)
+        self._rgb = np.empty((self.capacity, 3), dtype=np.float64)
+        self._timestamps = np.empty(self.capacity, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+        self._total = 0  # samples appended since start(), including overwritten ones
+        self._lock = threading.Lock()
+
+        # Live heart-rate estimate, fed incrementally by live_estimate()
+        self.estimator = None
+        self._estimated = 0
+        self._estimate_lock = threading.Lock()
+
+        self.state = 'idle'
+        self.started_at = None
+        self.mode = 'server'
+        self.method = 'green'
+        self.capture = None
+        self.face_tracker = None
+        self.last_active = time.time()
+
+        # Liveness detection state
+        self.liveness_passed = False
+        self.blink_detected = False
+        self.blink_start_time = 0
+
+    @property
+    def measuring(self):
+        return self.state == 'measuring'
+
+    def start(self, mode='server', method='green'):
+        """
+        Clears previous samples and liveness, and begins a new measurement.
+        `method` is the rPPG method (see ppg_signal.RPPG_METHODS) used for the result.
+        """
+        from ppg_signal import RPPG_METHODS  # SciPy loads with the first measurement
+
+        if mode not in PPG_MODES:
+            raise ValueError(f"Unknown PPG mode: {mode}")
+        if method not in RPPG_METHODS:
+            raise ValueError(f"Unknown rPPG method: {method}")
+        self.mode = mode
+        self.method = method
+        with self._lock:
+            self._next = 0
+            self._count = 0
+            self._total = 0
+        with self._estimate_lock:
+            self.estimator = None
+            self._estimated = 0
+        self.started_at = time.time()
+        self.liveness_passed = False
+        self.blink_detected = False
+        self.blink_start_time = 0
+        self.state = 'measuring'
+        self.touch()
+
+    def stop(self):
+        """Ends the measurement. Collected samples stay readable until the next start()."""
+        if self.state == 'measuring':
+            self.state = 'stopped'
+        self.touch()
+
+    def close(self):
+        """Stops the session's capture thread, which unsubscribes it from the camera."""
+        if self.state == 'measuring':
+            self.state = 'stopped'
+        if self.capture is not None:
+            self.capture.stop()
+            self.capture = None
+
+    def touch(self):
+        self.last_active = time.time()
+
+    def expire(self, max_seconds=MAX_MEASUREMENT_SECONDS):
+        """Stops a measurement that has run for longer than max_seconds. Returns True if it did."""
+        if self.measuring and time.time() - self.started_at > max_seconds:
+            self.state = 'stopped'
+            print(f"PPG session {self.session_id}: measurement stopped after {max_seconds} s.")
+            return True
+        return False
+
+    def add_sample(self, red, green, blue, timestamp=None):
+        """Appends one ROI colour sample, overwriting the oldest when the window is full."""
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            i = self._next
+            self._rgb[i] = (red, green, blue)
+            self._timestamps[i] = timestamp
+            self._next = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+            self._total += 1
+
+    def add_samples(self, batch):
+        """
+        Appends a batch of client-computed samples, each [timestamp_seconds, red,
+        green, blue]. Rows with non-finite values are dropped. Returns the number
+        of samples stored; raises ValueError if the batch is malformed, a colour
+        mean is outside 0-255, or the timestamps do not strictly increase from
+        the last stored sample.
+        """
+        rows = np.asarray(batch, dtype=np.float64)
+        if rows.size == 0:
+            return 0
+        if rows.ndim != 2 or rows.shape[1] != 4:
+            raise ValueError("Samples must be [timestamp, red, green, blue] rows.")
+        rows = rows[np.isfinite(rows).all(axis=1)][-self.capacity:]
+        if len(rows) == 0:
+            return 0
+        if ((rows[:, 1:] < 0) | (rows[:, 1:] > 255)).any():
+            raise ValueError("Colour means must be between 0 and 255.")
+        if (np.diff(rows[:, 0]) <= 0).any():
+            raise ValueError("Sample timestamps must increase.")
+
+        with self._lock:
+            if self._count and rows[0, 0] <= self._timestamps[self._next - 1]:
+                raise ValueError("Sample timestamps must increase.")
+            n = len(rows)
+            first = min(n, self.capacity - self._next)
+            self._timestamps[self._next:self._next + first] = rows[:first, 0]
+            self._rgb[self._next:self._next + first] = rows[:first, 1:]
+            self._timestamps[:n - first] = rows[first:, 0]
+            self._rgb[:n - first] = rows[first:, 1:]
+            self._next = (self._next + n) % self.capacity
+            self._count = min(self._count + n, self.capacity)
+            self._total += n
+        return n
+
+    def __len__(self):
+        return self._count
+
+    def samples(self):
+        """Returns (rgb, timestamps) copies in chronological order; rgb has shape (n, 3)."""
+        with self._lock:
+            if self._count < self.capacity:
+                return self._rgb[:self._count].copy(), self._timestamps[:self._count].copy()
+            order = np.r_[self._next:self.capacity, 0:self._next]
+            return self._rgb[order], self._timestamps[order]
+
+    def samples_since(self, total):
+        """
+        Returns (rgb, timestamps, new_total) for samples appended after the first
+        `total` ones. Samples already overwritten in the ring are skipped.
+        """
+        with self._lock:
+            new = min(self._total - total, self._count)
+            end = self._next
+            indices = np.arange(end - new, end) % self.capacity
+            return self._rgb[indices], self._timestamps[indices], self._total
+
+    def live_estimate(self):
+        """
+        Feeds the samples collected since the last call into the streaming
+        estimator, using the measurement's rPPG method so the live estimate
+        (and the UI's early stop) agrees with the final result, and returns
+        its current result.
+        """
+        with self._estimate_lock:
+            if self.estimator is None:
+                from ppg_signal import StreamingHeartRateEstimator
+                self.estimator = StreamingHeartRateEstimator(method=self.method)
+            rgb, timestamps, self._estimated = self.samples_since(self._estimated)
+            return self.estimator.update(rgb, timestamps)
+
+    def channel(self, name):
+        """Returns one colour channel ('red', 'green' or 'blue') in chronological order."""
+        rgb, _ = self.samples()
+        return rgb[:, ('red', 'green', 'blue').index(name)]
+
+    def sampling_rate(self, default=30):
+        """Estimates the sampling rate from the collected timestamps."""
+        _, timestamps = self.samples()
+        if len(timestamps) < 2 or timestamps[-1] <= timestamps[0]:
+            return default
+        return (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+
+
+class PPGSessionManager:
+    """
+    Keeps one PPGSession per user session so concurrent measurements never
+    share buffers. Sessions idle for longer than idle_ttl seconds are closed.
+    """
+
+    def __init__(self, idle_ttl=600):
+        self.idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def get_or_create(self, session_id):
+        with self._lock:
+            self._prune()
+            ppg = self._sessions.get(session_id)
+            if ppg is None:
+                ppg = self._sessions[session_id] = PPGSession(session_id)
+            ppg.touch()
+            return ppg
+
+    def close(self, session_id):
+        """Closes and forgets a session. Returns the closed session, or None."""
+        with self._lock:
+            ppg = self._sessions.pop(session_id, None)
+        if ppg is not None:
+            ppg.close()
+        return ppg
+
+    def active_count(self):
+        with self._lock:
+            return sum(1 for ppg in self._sessions.values() if ppg.measuring)
+
+    def _prune(self):
+        """Closes sessions idle past idle_ttl. Caller must hold the lock."""
+        cutoff = time.time() - self.idle_ttl
+        for session_id in [sid for sid, ppg in self._sessions.items() if ppg.last_active < cutoff]:
+            self._sessions.pop(session_id).close()
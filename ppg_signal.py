@@ -0,0 +1,355 @@
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+from scipy import signal
+from scipy.ndimage import uniform_filter1d
+
+# Plausible resting heart rates: 48-150 BPM
+HEART_RATE_BAND = (0.8, 2.5)
+# Camera samples are resampled to this uniform rate before any filtering or
+# spectral analysis, so frame-timing jitter does not bias the frequency axis
+RESAMPLE_FS = 30.0
+
+# Ways of turning the forehead RGB trace into a pulse signal:
+# 'green' uses the green channel alone; 'chrom' and 'pos' combine all three
+# channels to cancel intensity and specular changes from motion and lighting.
+RPPG_METHODS = ('green', 'chrom', 'pos')
+# Window length of the CHROM / POS projections
+RPPG_WINDOW_SECONDS = 1.6
+
+
+@lru_cache(maxsize=64)
+def design_bandpass(order, lowcut, highcut, fs):
+    """
+    Returns the SOS coefficients of a Butterworth band-pass, designed once per
+    key. The array is shared between callers and must not be modified.
+    """
+    return signal.butter(order, [lowcut, highcut], btype='bandpass', fs=fs, output='sos')
+
+
+def bandpass_filter(data, lowcut, highcut, fs, order=5):
+    """Applies a zero-phase bandpass filter to the signal."""
+    return signal.sosfiltfilt(design_bandpass(order, lowcut, highcut, float(fs)), data)
+
+
+def increasing_samples(timestamps, values):
+    """Drops samples whose timestamp does not advance past every earlier one."""
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(timestamps) < 2:
+        return timestamps, values
+    previous_max = np.maximum.accumulate(np.r_[-np.inf, timestamps[:-1]])
+    keep = timestamps > previous_max
+    return timestamps[keep], values[keep]
+
+
+def resample_uniform(timestamps, values, fs=RESAMPLE_FS):
+    """
+    Linearly interpolates irregularly timed samples onto a uniform grid at `fs`
+    starting at the first timestamp. `values` may be 1-D or (n, channels).
+    Returns (grid_times, grid_values).
+    """
+    timestamps, values = increasing_samples(timestamps, values)
+    if len(timestamps) < 2:
+        return timestamps, values
+    grid = np.arange(timestamps[0], timestamps[-1], 1.0 / fs)
+    if values.ndim == 1:
+        return grid, np.interp(grid, timestamps, values)
+    return grid, np.column_stack([np.interp(grid, timestamps, column) for column in values.T])
+
+
+def _overlap_add(segments, length):
+    """Sums (windows, window_length) segments starting at consecutive samples into one signal."""
+    count, window = segments.shape
+    positions = np.arange(count)[:, None] + np.arange(window)
+    return np.bincount(positions.ravel(), weights=segments.ravel(), minlength=length)
+
+
+def _chrominance_pulse(rgb, fs, projection, sign, taper):
+    """
+    Shared CHROM / POS core. The trace is normalised by its moving average,
+    projected onto two chrominance axes and band-passed as a whole; then, per
+    sliding window, the second signal is scaled to the first
+    (alpha = std1 / std2), combined, tapered and overlap-added.
+    """
+    rgb = np.asarray(rgb, dtype=np.float64)
+    window = max(int(RPPG_WINDOW_SECONDS * fs), 2)
+    sos = design_bandpass(4, HEART_RATE_BAND[0], HEART_RATE_BAND[1], float(fs))
+    if len(rgb) < window or len(rgb) <= 3 * (2 * len(sos) + 1):
+        return np.zeros(len(rgb))
+
+    means = uniform_filter1d(rgb, window, axis=0, mode='nearest')
+    means[means == 0] = 1.0
+    projected = (rgb / means) @ projection.T
+    filtered = signal.sosfiltfilt(sos, projected, axis=0)
+
+    s1 = np.lib.stride_tricks.sliding_window_view(filtered[:, 0], window)
+    s2 = np.lib.stride_tricks.sliding_window_view(filtered[:, 1], window)
+    std2 = s2.std(axis=1)
+    alpha = np.divide(s1.std(axis=1), std2, out=np.zeros_like(std2), where=std2 > 0)
+    h = s1 + sign * alpha[:, None] * s2
+    h = (h - h.mean(axis=1, keepdims=True)) * taper(window)
+    return _overlap_add(h, len(rgb))
+
+
+# Projection axes of the two methods, applied to skin-tone normalised RGB
+POS_PROJECTION = np.array([[0.0, 1.0, -1.0], [-2.0, 1.0, 1.0]])
+CHROM_PROJECTION = np.array([[3.0, -2.0, 0.0], [1.5, 1.0, -1.5]])
+
+
+def pos_signal(rgb, fs):
+    """
+    Plane-Orthogonal-to-Skin pulse (Wang et al., 2017): projects onto the
+    plane orthogonal to the skin tone, then S1 + alpha * S2 per window.
+    """
+    return _chrominance_pulse(rgb, fs, POS_PROJECTION, 1.0, np.ones)
+
+
+def chrom_signal(rgb, fs):
+    """
+    Chrominance-based pulse (de Haan & Jeanne, 2013): X = 3R - 2G and
+    Y = 1.5R + G - 1.5B, combined as X - alpha * Y per Hann-weighted window.
+    """
+    return _chrominance_pulse(rgb, fs, CHROM_PROJECTION, -1.0, np.hanning)
+
+
+def pulse_signal(rgb, fs, method='green'):
+    """Extracts a 1-D pulse signal from an (n, 3) uniformly sampled RGB trace."""
+    rgb = np.asarray(rgb, dtype=np.float64)
+    if method == 'green':
+        return rgb[:, 1]
+    if method == 'chrom':
+        return chrom_signal(rgb, fs)
+    if method == 'pos':
+        return pos_signal(rgb, fs)
+    raise ValueError(f"Unknown rPPG method: {method}")
+
+
+def calculate_heart_rate_advanced(signal_data, fs_est):
+    """Calculates heart rate from a uniformly sampled PPG signal using robust methods."""
+    if len(signal_data) < fs_est * 2:
+        return 0
+    
+    # 1. Preprocess: Detrend and filter
+    detrended_signal = signal.detrend(signal_data)
+    filtered_signal = bandpass_filter(detrended_signal, HEART_RATE_BAND[0], HEART_RATE_BAND[1], fs_est)
+
+    # 2. Method 1: FFT-based heart rate
+    n = len(filtered_signal)
+    yf = np.fft.rfft(filtered_signal)
+    xf = np.fft.rfftfreq(n, 1 / fs_est)
+    mask = (xf > HEART_RATE_BAND[0]) & (xf < HEART_RATE_BAND[1]) # Typical HR frequency range
+    if not mask.any(): return 0
+    
+    fft_peak_index = np.argmax(np.abs(yf[mask]))
+    hr_fft = xf[mask][fft_peak_index] * 60
+
+    # 3. Method 2: Peak detection in time domain
+    peaks, _ = signal.find_peaks(filtered_signal, distance=fs_est/2.5)
+    if len(peaks) < 2:
+        return hr_fft # Fallback to FFT result
+    
+    avg_interval = np.mean(np.diff(peaks)) / fs_est
+    hr_peaks = 60 / avg_interval
+    
+    # 4. Combine and validate
+    heart_rate = (hr_fft + hr_peaks) / 2
+    return heart_rate if 40 < heart_rate < 180 else 0
+
+
+def estimate_heart_rate(timestamps, rgb, fs=RESAMPLE_FS, method='green'):
+    """
+    Heart rate of an irregularly timed (n, 3) RGB trace: resamples to `fs`,
+    extracts the pulse with `method`, then runs calculate_heart_rate_advanced.
+    """
+    _, uniform = resample_uniform(timestamps, np.asarray(rgb, dtype=np.float64), fs)
+    if len(uniform) < 2:
+        return 0
+    return calculate_heart_rate_advanced(pulse_signal(uniform, fs, method), fs)
+
+
+class StreamingPulse:
+    """
+    Incremental CHROM / POS pulse for live estimates. Each new uniformly
+    sampled RGB row completes one sliding window of RPPG_WINDOW_SECONDS,
+    which is normalised by its own mean (the original per-window form of
+    both methods), projected, combined with alpha = std1 / std2, tapered and
+    overlap-added. A pulse sample is returned once the last window covering
+    it has been added, i.e. one window length behind the input.
+    """
+
+    def __init__(self, method, fs=RESAMPLE_FS):
+        if method not in ('chrom', 'pos'):
+            raise ValueError(f"StreamingPulse supports 'chrom' and 'pos', not {method!r}")
+        self.projection, self.sign, taper = {
+            'pos': (POS_PROJECTION, 1.0, np.ones),
+            'chrom': (CHROM_PROJECTION, -1.0, np.hanning),
+        }[method]
+        self.window = max(int(RPPG_WINDOW_SECONDS * fs), 2)
+        self.taper = taper(self.window)
+        self._history = np.empty((0, 3))
+        # Overlap-add sums for the last window - 1 samples, still open to later windows
+        self._open = np.zeros(self.window - 1)
+
+    def update(self, rgb):
+        """Takes new (n, 3) RGB rows and returns the pulse samples completed by them."""
+        rgb = np.r_[self._history, np.asarray(rgb, dtype=np.float64).reshape(-1, 3)]
+        window = self.window
+        if len(rgb) < window:
+            self._history = rgb
+            return np.zeros(0)
+
+        windows = np.lib.stride_tricks.sliding_window_view(rgb, window, axis=0)  # (count, 3, window)
+        means = windows.mean(axis=2, keepdims=True)
+        means[means == 0] = 1.0
+        projected = np.einsum('kc,ncw->nkw', self.projection, windows / means)
+        s1, s2 = projected[:, 0], projected[:, 1]
+        std2 = s2.std(axis=1)
+        alpha = np.divide(s1.std(axis=1), std2, out=np.zeros_like(std2), where=std2 > 0)
+        h = s1 + self.sign * alpha[:, None] * s2
+        h = (h - h.mean(axis=1, keepdims=True)) * self.taper
+
+        # Window i covers rgb[i:i + window]; the open sums cover rgb[:window - 1]
+        summed = _overlap_add(h, len(rgb))
+        summed[:window - 1] += self._open
+        count = len(h)
+        self._open = summed[count:]
+        self._history = rgb[count:]
+        return summed[:count]
+
+
+class StreamingHeartRateEstimator:
+    """
+    Heart-rate estimate that is updated as samples arrive instead of once at
+    the end of a measurement.
+
+    New samples are resampled onto a uniform grid at `fs` (when timestamps are
+    given) and band-passed with an IIR filter whose state is carried from one
+    update to the next (sosfilt with zi), so each sample is filtered exactly
+    once. The estimate is the Welch spectral peak over the last
+    `window_seconds` of filtered signal.
+
+    quality is the share of in-band power that lies within `peak_width_hz` of
+    the peak: near 1 for a clean pulse, low for noise or motion. The estimate
+    is `stable` once the last `stable_count` estimates agree within
+    `stable_tolerance` BPM and quality is at least `min_quality`.
+
+    `method` is the rPPG method applied to (n, 3) RGB input: 'green' takes
+    the green channel, 'chrom' and 'pos' go through StreamingPulse. 1-D input
+    is taken to be a pulse signal already.
+    """
+
+    def __init__(self, fs=RESAMPLE_FS, band=HEART_RATE_BAND, order=4, window_seconds=10, min_seconds=4,
+                 stable_count=5, stable_tolerance=3.0, min_quality=0.5, peak_width_hz=0.1, method='green'):
+        if method not in RPPG_METHODS:
+            raise ValueError(f"Unknown rPPG method: {method}")
+        self.fs = float(fs)
+        self.method = method
+        self._pulse = StreamingPulse(method, self.fs) if method != 'green' else None
+        self.band = band
+        self.sos = design_bandpass(order, band[0], band[1], self.fs)
+        self.min_samples = int(min_seconds * self.fs)
+        self.stable_tolerance = stable_tolerance
+        self.min_quality = min_quality
+        self.peak_width_hz = peak_width_hz
+
+        self._zi = None
+        self._offset = 0.0
+        # Incremental resampling state: last raw sample and next grid time
+        self._last_sample = None
+        self._next_grid_time = None
+        self._window = np.zeros(int(window_seconds * self.fs))
+        self._filled = 0
+        self._recent = deque(maxlen=stable_count)
+
+        self.samples_seen = 0
+        self.bpm = None
+        self.quality = 0.0
+
+    @property
+    def stable(self):
+        return (
+            len(self._recent) == self._recent.maxlen
+            and max(self._recent) - min(self._recent) <= self.stable_tolerance
+            and self.quality >= self.min_quality
+        )
+
+    def update(self, values, timestamps=None):
+        """
+        Filters a chunk of new raw samples, refreshes the estimate and returns
+        result(). Without timestamps the samples are taken to be at `fs` already.
+        `values` are (n, 3) RGB rows or a 1-D pulse signal.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if timestamps is not None:
+            values = self._resample(np.asarray(timestamps, dtype=np.float64), values)
+        if values.ndim == 2:
+            values = values[:, 1] if self._pulse is None else self._pulse.update(values)
+        if values.size == 0:
+            return self.result()
+
+        if self._zi is None:
+            # Start the filter from rest around the first sample to avoid a step transient
+            self._offset = values[0]
+            self._zi = np.zeros((self.sos.shape[0], 2))
+        filtered, self._zi = signal.sosfilt(self.sos, values - self._offset, zi=self._zi)
+
+        size = len(self._window)
+        if len(filtered) >= size:
+            self._window[:] = filtered[-size:]
+        else:
+            self._window[:-len(filtered)] = self._window[len(filtered):]
+            self._window[-len(filtered):] = filtered
+        self._filled = min(self._filled + len(filtered), size)
+        self.samples_seen += len(filtered)
+
+        if self.samples_seen >= self.min_samples:
+            self._estimate(self._window[size - self._filled:])
+        return self.result()
+
+    def _resample(self, timestamps, values):
+        """Continues the uniform grid from the previous chunk across this one."""
+        if self._last_sample is not None:
+            timestamps = np.r_[self._last_sample[0], timestamps]
+            values = np.concatenate([self._last_sample[1], values])
+        timestamps, values = increasing_samples(timestamps, values)
+        if len(timestamps) == 0:
+            return values
+        if self._next_grid_time is None:
+            self._next_grid_time = timestamps[0]
+        self._last_sample = (timestamps[-1], values[-1:])
+
+        step = 1.0 / self.fs
+        count = int(np.floor((timestamps[-1] - self._next_grid_time) / step)) + 1
+        if count <= 0:
+            return values[:0]
+        grid = self._next_grid_time + step * np.arange(count)
+        self._next_grid_time = grid[-1] + step
+        if values.ndim == 2:
+            return np.column_stack([np.interp(grid, timestamps, column) for column in values.T])
+        return np.interp(grid, timestamps, values)
+
+    def _estimate(self, data):
+        nperseg = min(len(data), int(self.fs * 8))
+        freqs, power = signal.welch(data, fs=self.fs, nperseg=nperseg, noverlap=nperseg // 2,
+                                    nfft=max(1024, nperseg))
+        in_band = (freqs >= self.band[0]) & (freqs <= self.band[1])
+        band_power = power[in_band]
+        total = band_power.sum()
+        if total <= 0:
+            return
+
+        peak_freq = freqs[in_band][np.argmax(band_power)]
+        near_peak = np.abs(freqs[in_band] - peak_freq) <= self.peak_width_hz
+        self.quality = float(band_power[near_peak].sum() / total)
+        self.bpm = float(peak_freq * 60)
+        self._recent.append(self.bpm)
+
+    def result(self):
+        return {
+            'bpm': round(self.bpm, 1) if self.bpm is not None else None,
+            'quality': round(self.quality, 3),
+            'stable': self.stable,
+            'samples': self.samples_seen,
+        }
@@ -3,6 +3,8 @@ import json
 import re
 import os # NEW: Import the 'os' module to handle file paths
 
+from recipe_store import assign_recipe_ids
+
 def get_ayurvedic_properties(ingredients_str):
     """Analyzes ingredients to determine their likely effect on doshas."""
     properties = {'vata': 'Neutral', 'pitta': 'Neutral', 'kapha': 'Neutral'}
@@ -66,6 +68,8 @@ def create_recipe_database():
                     "properties": properties
                 })
 
+        # Stored with each recipe, so ids stay put when the CSV changes
+        assign_recipe_ids(recipe_list)
         with open(json_file_path, 'w', encoding='utf-8') as outfile:
             json.dump(recipe_list, outfile, indent=4)
         print(f"✅ Success! Created recipe database with {len(recipe_list)} recipes at: {json_file_path}")
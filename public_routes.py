@@ -0,0 +1,67 @@
+import json
+
+from flask import Blueprint, render_template, request, redirect, url_for, session, jsonify
+
+from personal_diet_tool import RESPONSE_CACHE, ChatContext, chat_context, get_tool_response
+from stores import chat_contexts
+
+# --- Public & Core App Routes ---
+# Landing pages, sign-up and the assistant chat. Part of the 'api' service.
+public_bp = Blueprint('public', __name__)
+
+@public_bp.route('/loading')
+def loading():
+    return render_template('loading.html')
+
+@public_bp.route('/')
+def home():
+    return render_template('home.html')
+
+@public_bp.route('/contact')
+def contact_us():
+    return render_template('contact_us.html')
+
+@public_bp.route('/signup')
+def signup():
+    return render_template('signup.html')
+
+@public_bp.route('/logout')
+def logout():
+    session.clear()
+    return redirect(url_for('.home'))
+
+@public_bp.route('/predict', methods=['POST'])
+def predict():
+    text = request.get_json().get("message")
+    user_id = session.get('user_id', 'anonymous_user')
+    response = get_tool_response(user_id, text, user_chat_context())
+    return jsonify({"answer": response})
+
+def user_chat_context():
+    """
+    The ChatContext of the current user. Values in the session win, since a
+    scan or form updates the session before the diagnosis is saved again; the
+    saved diagnosis (derived once per save) fills in the rest.
+    """
+    current = chat_context({
+        'form_data': session.get('form_data'),
+        'dominant_dosha': session.get('dominant_dosha'),
+        'ppg_results': session.get('ppg_results')
+    })
+    if 'user_id' not in session:
+        return current
+    try:
+        saved = chat_contexts.get(session['user_id'])
+    except (FileNotFoundError, json.JSONDecodeError):
+        return current
+    return ChatContext(*(value if value is not None else saved_value for value, saved_value in zip(current, saved)))
+
+@public_bp.route('/predict/stats')
+def predict_stats():
+    """
+    Hit rates of the chat response cache and the per-user context cache, for
+    doctors only. It stays in the 'api' service, whose processes hold the caches.
+    """
+    if 'user_id' not in session or session.get('role') != 'doctor':
+        return jsonify({'error': 'Unauthorized'}), 401
+    return jsonify({'responses': RESPONSE_CACHE.stats(), 'contexts': chat_contexts.stats()})
@@ -0,0 +1,108 @@
+import json
+import os
+import re
+import threading
+
+# Dosha effects that make a recipe suitable for a patient with that dominant dosha.
+SUITABLE_EFFECTS = ('Decrease', 'Neutral')
+DOSHAS = ('vata', 'pitta', 'kapha')
+RECIPE_FIELDS = ('id', 'name', 'ingredients', 'instructions', 'properties')
+
+
+def assign_recipe_ids(recipes):
+    """
+    Gives every recipe a stable string id. An explicit 'id' is kept; otherwise
+    the id is a slug of the name ('Masala Dosa' -> 'masala-dosa'), with -2, -3
+    ... for repeated names. Unlike a list position, it survives recipes being
+    added to or removed from the database.
+    """
+    taken = {str(recipe['id']) for recipe in recipes if recipe.get('id') is not None}
+    for recipe in recipes:
+        if recipe.get('id') is not None:
+            recipe['id'] = str(recipe['id'])
+            continue
+        slug = re.sub(r'[^a-z0-9]+', '-', str(recipe.get('name', '')).lower()).strip('-') or 'recipe'
+        recipe_id, count = slug, 1
+        while recipe_id in taken:
+            count += 1
+            recipe_id = f'{slug}-{count}'
+        taken.add(recipe_id)
+        recipe['id'] = recipe_id
+    return recipes
+
+
+def project_recipe(recipe, fields=None):
+    """Returns only the requested fields of a recipe (the id is always kept)."""
+    if not fields:
+        return recipe
+    projected = {'id': recipe.get('id')}
+    for field in fields:
+        if field in recipe:
+            projected[field] = recipe[field]
+    return projected
+
+
+class RecipeStore:
+    """
+    Keeps the recipe database (the output of process_recipes.create_recipe_database)
+    in memory and serves the per-dosha recommendation lists without re-parsing
+    the file on every request. The file is reloaded when its mtime changes.
+    """
+
+    def __init__(self, path='data/recipes.json'):
+        self.path = path
+        self._lock = threading.Lock()
+        # (mtime, all recipes, {dosha: recommended recipes}, {id: recipe}) swapped in as one unit
+        self._snapshot = (None, (), {}, {})
+
+    def _load(self):
+        """Returns the current snapshot, reloading it if the file has changed."""
+        mtime = os.stat(self.path).st_mtime_ns
+        snapshot = self._snapshot
+        if snapshot[0] == mtime:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot[0] == mtime:
+                return self._snapshot
+
+            with open(self.path, 'r', encoding='utf-8') as f:
+                recipes = tuple(json.load(f))
+            assign_recipe_ids(recipes)
+
+            by_dosha = {
+                dosha: tuple(
+                    recipe for recipe in recipes
+                    if recipe.get('properties', {}).get(dosha) in SUITABLE_EFFECTS
+                )
+                for dosha in DOSHAS
+            }
+            by_id = {recipe['id']: recipe for recipe in recipes}
+            self._snapshot = (mtime, recipes, by_dosha, by_id)
+            return self._snapshot
+
+    def all_recipes(self):
+        """Returns every recipe in the database."""
+        return self._load()[1]
+
+    def get(self, recipe_id):
+        """Returns a single recipe by id, or None if there is no such recipe."""
+        return self._load()[3].get(recipe_id)
+
+    def recommended_for(self, dosha):
+        """
+        Returns the recipes that decrease or are neutral for the given dosha.
+        Raises FileNotFoundError / json.JSONDecodeError if the database is unusable.
+        """
+        return self._load()[2].get(dosha.lower(), ())
+
+    def recommended_page(self, dosha, offset=0, limit=None):
+        """
+        Returns (recipes, total, next_offset) for one page of the recommendations.
+        next_offset is None once the last page has been reached.
+        """
+        recommended = self.recommended_for(dosha)
+        total = len(recommended)
+        end = total if limit is None else min(offset + limit, total)
+        next_offset = end if end < total else None
+        return recommended[offset:end], total, next_offset
@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Report kinds rendered by pdf_reports.REPORT_RENDERERS. Listed here so jobs can
+# be validated without importing pdf_reports, which loads FPDF.
+REPORT_KINDS = ('simple', 'diagnosis', 'diet_chart', 'doctor_diet_chart')
+
+
+def render_report(kind, payload):
+    """
+    Renders a report by kind. Module-level so it can run in a process pool;
+    pdf_reports (and FPDF) load with the first report rendered.
+    """
+    from pdf_reports import REPORT_RENDERERS
+
+    return REPORT_RENDERERS[kind](payload)
+
+
+class ReportQueue:
+    """
+    Renders PDF reports on a background thread (or process) pool and caches
+    finished PDFs on disk, keyed by a hash of the report kind and its inputs.
+
+    Job state lives in the cache directory, not in memory, so any worker
+    process sharing the directory can answer a poll:
+
+        <key>.pdf             the finished report
+        <key>.running         a render is in progress (created exclusively, so
+                              only one process renders the same inputs)
+        <key>.error           the render failed; holds the message
+        jobs/<job_id>.json    who asked for it, the report kind and filename
+
+    The job id is a hash of the owner and the cache key, so it is the same in
+    every process and a repeat request returns the same job. submit() returns
+    it; poll with status() and collect with result(). A repeat request for
+    unchanged inputs is served straight from the cache without rendering.
+
+    The cache is pruned now and then: PDFs unused for cache_max_age seconds
+    go first, then the least recently used until the directory is under
+    cache_max_bytes; job records and error markers expire after job_ttl.
+    """
+
+    def __init__(self, cache_dir='data/report_cache', max_workers=2, use_processes=False, job_ttl=3600,
+                 render_timeout=300, cache_max_bytes=200 * 1024 * 1024, cache_max_age=7 * 24 * 3600,
+                 prune_interval=300):
+        self.cache_dir = cache_dir
+        self.jobs_dir = os.path.join(cache_dir, 'jobs')
+        self.job_ttl = job_ttl
+        self.render_timeout = render_timeout
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_max_age = cache_max_age
+        self.prune_interval = prune_interval
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self._executor = executor_class(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    @staticmethod
+    def cache_key(kind, payload):
+        encoded = json.dumps({'kind': kind, 'payload': payload}, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def job_id_for(owner, key):
+        return hashlib.sha256(f'{owner}:{key}'.encode('utf-8')).hexdigest()
+
+    def _cache_path(self, key, suffix='.pdf'):
+        return os.path.join(self.cache_dir, f'{key}{suffix}')
+
+    def _job_path(self, job_id):
+        return os.path.join(self.jobs_dir, f'{job_id}.json')
+
+    def _read_cache(self, key):
+        path = self._cache_path(key)
+        try:
+            with open(path, 'rb') as f:
+                pdf_bytes = f.read()
+        except FileNotFoundError:
+            return None
+        # Mark as recently used, for pruning
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return pdf_bytes
+
+    def _write_atomic(self, path, data):
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _write_cache(self, key, pdf_bytes):
+        self._write_atomic(self._cache_path(key), pdf_bytes)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _age(self, path):
+        """Seconds since `path` was modified, or None if it does not exist."""
+        try:
+            return time.time() - os.path.getmtime(path)
+        except FileNotFoundError:
+            return None
+
+    def _claim(self, key):
+        """
+        Creates <key>.running unless another process holds a live one. Returns
+        True if this process should render. A marker older than render_timeout
+        belongs to a render that died and is taken over.
+        """
+        path = self._cache_path(key, '.running')
+        for _ in range(2):
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                age = self._age(path)
+                if age is not None and age < self.render_timeout:
+                    return False
+                self._remove(path)
+        return False
+
+    def render(self, kind, payload):
+        """Renders a report in the calling thread, using and filling the disk cache."""
+        self.maybe_prune()
+        key = self.cache_key(kind, payload)
+        pdf_bytes = self._read_cache(key)
+        if pdf_bytes is None:
+            pdf_bytes = render_report(kind, payload)
+            self._write_cache(key, pdf_bytes)
+        return pdf_bytes
+
+    def submit(self, kind, payload, owner=None, filename=None):
+        """Queues a report for background rendering and returns its job id."""
+        if kind not in REPORT_KINDS:
+            raise ValueError(f"Unknown report kind: {kind}")
+
+        self.maybe_prune()
+        key = self.cache_key(kind, payload)
+        job_id = self.job_id_for(owner, key)
+        job = {
+            'job_id': job_id,
+            'kind': kind,
+            'key': key,
+            'owner': owner,
+            'filename': filename or f'{kind}.pdf',
+            'created': time.time(),
+        }
+        self._write_atomic(self._job_path(job_id), json.dumps(job).encode('utf-8'))
+
+        if os.path.exists(self._cache_path(key)) or not self._claim(key):
+            # Already rendered, or the same inputs are rendering in some process
+            return job_id
+
+        self._remove(self._cache_path(key, '.error'))
+        future = self._executor.submit(render_report, kind, payload)
+        future.add_done_callback(lambda f: self._finish(job_id, key, f))
+        return job_id
+
+    def _finish(self, job_id, key, future):
+        try:
+            self._write_cache(key, future.result())
+        except Exception as e:
+            print(f"Report job {job_id} failed: {e}")
+            self._write_atomic(self._cache_path(key, '.error'), str(e).encode('utf-8'))
+        finally:
+            self._remove(self._cache_path(key, '.running'))
+
+    def status(self, job_id):
+        """
+        Returns the job record with its current 'status' (pending, running,
+        done or error) and 'error', or None if the job is unknown.
+        """
+        if not re.fullmatch(r'[0-9a-f]{64}', job_id or ''):
+            return None
+        try:
+            with open(self._job_path(job_id), 'r', encoding='utf-8') as f:
+                job = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        key = job['key']
+        job['status'], job['error'] = 'pending', None
+        running_age = self._age(self._cache_path(key, '.running'))
+        if os.path.exists(self._cache_path(key)):
+            job['status'] = 'done'
+        elif running_age is not None and running_age < self.render_timeout:
+            job['status'] = 'running'
+        elif os.path.exists(self._cache_path(key, '.error')):
+            try:
+                with open(self._cache_path(key, '.error'), 'r', encoding='utf-8') as f:
+                    job['status'], job['error'] = 'error', f.read()
+            except FileNotFoundError:
+                pass
+        elif running_age is not None or time.time() - job['created'] > self.render_timeout:
+            job['status'], job['error'] = 'error', 'The report was not rendered; please request it again.'
+        return job
+
+    def result(self, job_id):
+        """Returns the rendered PDF bytes of a finished job, or None."""
+        job = self.status(job_id)
+        if not job or job['status'] != 'done':
+            return None
+        return self._read_cache(job['key'])
+
+    def maybe_prune(self):
+        """Prunes the cache if it has not been pruned in this process for prune_interval seconds."""
+        with self._lock:
+            if time.time() - self._last_prune < self.prune_interval:
+                return
+            self._last_prune = time.time()
+        try:
+            self.prune()
+        except OSError as e:
+            print(f"Report cache pruning failed: {e}")
+
+    def prune(self):
+        """
+        Deletes expired job records, error markers, stale running markers and
+        stray temporary files, PDFs unused for cache_max_age, then the least recently used PDFs until
+        the cache is under cache_max_bytes.
+        """
+        now = time.time()
+        for name in os.listdir(self.jobs_dir):
+            path = os.path.join(self.jobs_dir, name)
+            if now - os.path.getmtime(path) > self.job_ttl:
+                self._remove(path)
+
+        pdfs = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_file():
+                continue
+            age = now - entry.stat().st_mtime
+            if entry.name.endswith('.pdf'):
+                if age > self.cache_max_age:
+                    self._remove(entry.path)
+                else:
+                    pdfs.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+            elif entry.name.endswith(('.error', '.tmp')) and age > self.job_ttl:
+                self._remove(entry.path)
+            elif entry.name.endswith('.running') and age > self.render_timeout:
+                self._remove(entry.path)
+
+        total = sum(size for _, size, _ in pdfs)
+        for _, size, path in sorted(pdfs):
+            if total <= self.cache_max_bytes:
+                break
+            self._remove(path)
+            total -= size
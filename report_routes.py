@@ -0,0 +1,321 @@
+import os
+import time
+
+from flask import Blueprint, request, redirect, url_for, session, flash, jsonify, make_response
+
+from report_queue import ReportQueue
+
+# --- PDF and Text Report Routes ---
+# CPU-heavy; part of the 'compute' service.
+reports_bp = Blueprint('reports', __name__)
+
+# PDF reports render on a background pool and are cached on disk by input hash.
+# Job state is kept in the cache directory, so every worker sharing it can answer polls.
+report_queue = ReportQueue(
+    'data/report_cache',
+    max_workers=int(os.environ.get('VEDYURA_REPORT_WORKERS', 2)),
+    cache_max_bytes=int(float(os.environ.get('VEDYURA_REPORT_CACHE_MB', 200)) * 1024 * 1024),
+    cache_max_age=float(os.environ.get('VEDYURA_REPORT_CACHE_DAYS', 7)) * 24 * 3600,
+)
+
+def doctor_diet_chart_report():
+    """Collects the inputs of the doctor's diet chart PDF. Returns (payload, filename)."""
+    patient_id = request.form.get('patient_id')
+    patient_info = {
+        'id': patient_id,
+        'name': 'John Doe',
+        'age': 35,
+    }
+
+    meal_plan = {
+        'Breakfast': {
+            'items': request.form.get('breakfast_items'),
+            'advice': request.form.get('breakfast_advice')
+        },
+        'Lunch': {
+            'items': request.form.get('lunch_items'),
+            'advice': request.form.get('lunch_advice')
+        },
+        'Dinner': {
+            'items': request.form.get('dinner_items'),
+            'advice': request.form.get('dinner_advice')
+        },
+        'Snacks': {
+            'items': request.form.get('snacks_items'),
+            'advice': request.form.get('snacks_advice')
+        }
+    }
+    payload = {
+        'patient_info': patient_info,
+        'meal_plan': meal_plan,
+        'professional_advice': request.form.get('professional_advice')
+    }
+    return payload, f'Diet_Chart_{patient_info["name"].replace(" ", "_")}.pdf'
+
+@reports_bp.route('/doctor/generate-diet-chart-pdf', methods=['POST'])
+def generate_doctor_diet_chart_pdf():
+    if 'user_id' not in session or session.get('role') != 'doctor':
+        return redirect(url_for('public.signup'))
+
+    payload, filename = doctor_diet_chart_report()
+    pdf_bytes = report_queue.render('doctor_diet_chart', payload)
+
+    response = make_response(pdf_bytes)
+    response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    response.headers.set('Content-Type', 'application/pdf')
+
+    return response
+
+
+def diagnosis_report():
+    """Collects the inputs of the dosha analysis PDF. Returns (payload, filename)."""
+    # Get form data from request
+    form_data = request.get_json(silent=True)
+    if not form_data:
+        raise ValueError('No form data provided')
+
+    payload = {
+        'patient_id': session['user_id'],
+        'form_data': form_data,
+        # Get PPG results from session if available
+        'ppg_results': session.get('ppg_results', {}),
+        # Printed on the report; part of the cache key, so each day renders anew
+        'date': time.strftime('%Y-%m-%d')
+    }
+    return payload, f'vedyura-dosha-analysis-{session["user_id"]}.pdf'
+
+@reports_bp.route('/generate_pdf', methods=['POST'])
+def generate_diagnosis_pdf():
+    """Generates a comprehensive dosha analysis PDF report."""
+    if 'user_id' not in session or session.get('role') != 'patient':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        try:
+            payload, filename = diagnosis_report()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        pdf_content = report_queue.render('diagnosis', payload)
+        
+        # Create response
+        response = make_response(pdf_content)
+        response.headers['Content-Type'] = 'application/pdf'
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+        
+        return response
+        
+    except Exception as e:
+        print(f"Error generating PDF: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': f'Failed to generate PDF: {str(e)}'}), 500
+
+
+def diet_chart_report():
+    """Collects the inputs of the patient's diet chart PDF. Returns (payload, filename)."""
+    form_data = session.get('form_data')
+    if not form_data:
+        raise ValueError("Please complete the self-diagnosis form first.")
+
+    payload = {
+        'form_data': form_data,
+        'ppg_results': session.get('ppg_results', {})  # Get the new detailed PPG results
+    }
+    return payload, 'Vedyura_Health_Plan.pdf'
+
+@reports_bp.route('/patient/generate-diet-chart')
+def generate_diet_chart_pdf():
+    """
+    Generates a diet chart PDF that now INCLUDES the detailed
+    Ayurvedic pulse analysis from the new PPG model.
+    """
+    if 'user_id' not in session:
+        return redirect(url_for('public.signup'))
+
+    try:
+        payload, filename = diet_chart_report()
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for('patient.patient_self_diagnosis'))
+
+    pdf_bytes = report_queue.render('diet_chart', payload)
+
+    # --- Create and return the response ---
+    response = make_response(pdf_bytes)
+    response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    response.headers.set('Content-Type', 'application/pdf')
+    return response
+
+
+def simple_report():
+    """Collects the inputs of the short dosha analysis PDF. Returns (payload, filename)."""
+    # Get form data
+    form_data = request.get_json(silent=True) or {}
+    print(f"Form data received: {form_data}")
+
+    payload = {'patient_id': session['user_id'], 'form_data': form_data, 'date': time.strftime('%Y-%m-%d')}
+    return payload, f'vedyura-analysis-{session["user_id"]}.pdf'
+
+@reports_bp.route('/simple_pdf', methods=['POST'])
+def simple_pdf_generation():
+    """Simplified PDF generation endpoint for testing"""
+    print("Simple PDF generation called")
+    
+    if 'user_id' not in session:
+        session['user_id'] = 'test_user'
+        session['role'] = 'patient'
+    
+    try:
+        payload, filename = simple_report()
+        
+        # Generate PDF with proper encoding handling
+        try:
+            pdf_content = report_queue.render('simple', payload)
+            print(f"PDF generated successfully, size: {len(pdf_content)} bytes")
+            
+            # Create response
+            response = make_response(pdf_content)
+            response.headers['Content-Type'] = 'application/pdf'
+            response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+            
+            return response
+            
+        except UnicodeEncodeError as e:
+            print(f"Unicode encoding error: {e}")
+            return jsonify({'error': 'PDF generation failed due to character encoding. Try the text report instead.'}), 500
+        
+    except Exception as e:
+        print(f"Error in simple PDF generation: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': f'PDF generation failed: {str(e)}'}), 500
+
+
+# --- Background report rendering ---
+
+# Report kind -> (role required to request it, or None for any logged-in user; input collector)
+REPORT_REQUESTS = {
+    'diet_chart': (None, diet_chart_report),
+    'diagnosis': ('patient', diagnosis_report),
+    'doctor_diet_chart': ('doctor', doctor_diet_chart_report),
+    'simple': (None, simple_report),
+}
+
+@reports_bp.route('/reports/<kind>/jobs', methods=['POST'])
+def submit_report_job(kind):
+    """
+    Queues a report for background rendering. Takes the same inputs as the
+    matching synchronous endpoint and returns a job id to poll.
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    if kind not in REPORT_REQUESTS:
+        return jsonify({'error': f'Unknown report type: {kind}'}), 404
+
+    required_role, collect_inputs = REPORT_REQUESTS[kind]
+    if required_role and session.get('role') != required_role:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    try:
+        payload, filename = collect_inputs()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    job_id = report_queue.submit(kind, payload, owner=session['user_id'], filename=filename)
+    job = report_queue.status(job_id)
+    return jsonify({
+        'job_id': job_id,
+        'status': job['status'],
+        'status_url': url_for('.report_job_status', job_id=job_id),
+        'download_url': url_for('.download_report_job', job_id=job_id)
+    }), 202
+
+@reports_bp.route('/reports/jobs/<job_id>')
+def report_job_status(job_id):
+    """Returns the status of a queued report: pending, running, done or error."""
+    job = report_queue.status(job_id)
+    if not job or job['owner'] != session.get('user_id'):
+        return jsonify({'error': 'Report job not found'}), 404
+    return jsonify({'job_id': job_id, 'kind': job['kind'], 'status': job['status'], 'error': job['error']})
+
+@reports_bp.route('/reports/jobs/<job_id>/download')
+def download_report_job(job_id):
+    """Downloads a finished report."""
+    job = report_queue.status(job_id)
+    if not job or job['owner'] != session.get('user_id'):
+        return jsonify({'error': 'Report job not found'}), 404
+
+    pdf_content = report_queue.result(job_id)
+    if pdf_content is None:
+        return jsonify({'job_id': job_id, 'status': job['status'], 'error': job['error']}), 409
+
+    response = make_response(pdf_content)
+    response.headers['Content-Type'] = 'application/pdf'
+    response.headers['Content-Disposition'] = f'attachment; filename={job["filename"]}'
+    return response
+
+
+@reports_bp.route('/text_report', methods=['POST'])
+def generate_text_report():
+    """Fallback text report if PDF generation fails"""
+    print("Text report generation called")
+    
+    if 'user_id' not in session:
+        session['user_id'] = 'test_user'
+        session['role'] = 'patient'
+    
+    try:
+        # Get form data
+        form_data = request.get_json() or {}
+        
+        # Import required modules
+        from health_analyzer import determine_dominant_dosha
+        
+        # Determine dosha
+        dominant_dosha = determine_dominant_dosha(form_data) if form_data else "Tridoshic"
+        
+        # Define descriptions and recommendations
+        descriptions = {
+            'Vata': 'Air and Space elements. Energetic and creative nature. Tends to be quick-thinking but may experience anxiety.',
+            'Pitta': 'Fire and Water elements. Focused and ambitious nature. Strong digestion but may experience anger.',
+            'Kapha': 'Earth and Water elements. Calm and stable nature. Strong immunity but may experience sluggishness.'
+        }
+        
+        recommendations = {
+            'Vata': '- Follow regular routines\n- Eat warm, nourishing foods\n- Practice calming activities\n- Get adequate rest',
+            'Pitta': '- Stay cool and avoid overheating\n- Eat fresh, cooling foods\n- Practice moderation\n- Manage stress effectively',
+            'Kapha': '- Stay active and energized\n- Eat light, spicy foods\n- Engage in vigorous exercise\n- Avoid heavy foods'
+        }
+        # Backslashes aren't allowed inside f-string expressions before Python 3.12
+        default_recommendations = '- Maintain balance in all aspects\n- Eat seasonal foods\n- Listen to your body\n- Practice mindfulness'
+        
+        # Create text report
+        report = f"""VEDYURA DOSHA ANALYSIS REPORT
+=============================
+
+Patient ID: {session["user_id"]}
+Date: {time.strftime("%Y-%m-%d %H:%M:%S")}
+Dominant Dosha: {dominant_dosha}
+
+DESCRIPTION:
+{descriptions.get(dominant_dosha, 'Balanced constitution with mixed characteristics.')}
+
+BASIC RECOMMENDATIONS:
+{recommendations.get(dominant_dosha, default_recommendations)}
+
+DISCLAIMER:
+This analysis is for educational purposes only and should not replace professional medical advice.
+
+Generated by Vedyura Ayurvedic Healthcare Platform"""
+        
+        # Create text file response
+        response = make_response(report)
+        response.headers['Content-Type'] = 'text/plain'
+        response.headers['Content-Disposition'] = f'attachment; filename=vedyura-report-{session["user_id"]}.txt'
+        
+        return response
+        
+    except Exception as e:
+        print(f"Error in text report generation: {e}")
+        return jsonify({'error': f'Report generation failed: {str(e)}'}), 500
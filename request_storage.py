@@ -0,0 +1,192 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+
+class RequestStorage(ABC):
+    """
+    Interface for storing doctor/patient consultation requests.
+    Each request is a dict with at least doctor_id, patient_id and status.
+    """
+
+    @abstractmethod
+    def add(self, request_data):
+        """Stores a new request."""
+
+    @abstractmethod
+    def update_status(self, doctor_id, patient_id, from_status, to_status):
+        """
+        Moves the first request between doctor and patient that is in from_status
+        to to_status. Returns True if a request was updated.
+        """
+
+    @abstractmethod
+    def for_doctor(self, doctor_id, statuses=None):
+        """Returns the doctor's requests, optionally only those in the given statuses."""
+
+    @abstractmethod
+    def all(self):
+        """Returns every stored request."""
+
+
+class JsonRequestStorage(RequestStorage):
+    """
+    The original storage: the whole of requests.json is rewritten on every change.
+    Writes are serialised within a process, but not across worker processes.
+    """
+
+    def __init__(self, path='data/requests.json'):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+                return data if isinstance(data, dict) and 'requests' in data else {'requests': []}
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'requests': []}
+
+    def _save(self, requests_data):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(requests_data, f, indent=4)
+        os.replace(tmp_path, self.path)
+
+    def add(self, request_data):
+        with self._lock:
+            requests_data = self._load()
+            requests_data['requests'].append(request_data)
+            self._save(requests_data)
+
+    def update_status(self, doctor_id, patient_id, from_status, to_status):
+        with self._lock:
+            requests_data = self._load()
+            for req in requests_data['requests']:
+                if (str(req.get('doctor_id')) == str(doctor_id) and str(req.get('patient_id')) == str(patient_id)
+                        and req.get('status') == from_status):
+                    req['status'] = to_status
+                    self._save(requests_data)
+                    return True
+        return False
+
+    def for_doctor(self, doctor_id, statuses=None):
+        return [
+            req for req in self._load()['requests']
+            if str(req.get('doctor_id')) == str(doctor_id) and (statuses is None or req.get('status') in statuses)
+        ]
+
+    def all(self):
+        return self._load()['requests']
+
+
+class SqliteRequestStorage(RequestStorage):
+    """
+    Stores requests in SQLite (WAL mode) with indexed doctor_id, patient_id and
+    status columns, so every change is a single-row write and dashboard queries
+    only touch the rows they need. Safe to share between worker processes.
+
+    On first use the existing requests.json (if any) is imported.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS requests (
+            pk INTEGER PRIMARY KEY AUTOINCREMENT,
+            doctor_id TEXT NOT NULL,
+            patient_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            payload TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_requests_doctor_status ON requests (doctor_id, status);
+        CREATE INDEX IF NOT EXISTS idx_requests_patient_status ON requests (patient_id, status);
+    """
+
+    def __init__(self, db_path='data/vedyura.db', import_from='data/requests.json'):
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.executescript(self.SCHEMA)
+        if import_from:
+            self._import_json(import_from)
+
+    def _connection(self):
+        """Returns this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _import_json(self, json_path):
+        conn = self._connection()
+        # BEGIN IMMEDIATE takes the write lock, so only one worker performs the import
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if conn.execute('SELECT 1 FROM requests LIMIT 1').fetchone() is None:
+                legacy_requests = JsonRequestStorage(json_path).all()
+                conn.executemany(
+                    'INSERT INTO requests (doctor_id, patient_id, status, payload) VALUES (?, ?, ?, ?)',
+                    [self._row_values(req) for req in legacy_requests]
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    @staticmethod
+    def _row_values(request_data):
+        return (
+            str(request_data.get('doctor_id')),
+            str(request_data.get('patient_id')),
+            request_data.get('status', 'pending'),
+            json.dumps(request_data)
+        )
+
+    @staticmethod
+    def _from_row(status, payload):
+        request_data = json.loads(payload)
+        request_data['status'] = status
+        return request_data
+
+    def add(self, request_data):
+        self._connection().execute(
+            'INSERT INTO requests (doctor_id, patient_id, status, payload) VALUES (?, ?, ?, ?)',
+            self._row_values(request_data)
+        )
+
+    def update_status(self, doctor_id, patient_id, from_status, to_status):
+        cursor = self._connection().execute(
+            'UPDATE requests SET status = ? WHERE pk = ('
+            '  SELECT pk FROM requests WHERE doctor_id = ? AND patient_id = ? AND status = ? ORDER BY pk LIMIT 1'
+            ')',
+            (to_status, str(doctor_id), str(patient_id), from_status)
+        )
+        return cursor.rowcount > 0
+
+    def for_doctor(self, doctor_id, statuses=None):
+        query = 'SELECT status, payload FROM requests WHERE doctor_id = ?'
+        params = [str(doctor_id)]
+        if statuses is not None:
+            statuses = list(statuses)
+            query += f" AND status IN ({', '.join('?' * len(statuses))})"
+            params.extend(statuses)
+        rows = self._connection().execute(query + ' ORDER BY pk', params)
+        return [self._from_row(status, payload) for status, payload in rows]
+
+    def all(self):
+        rows = self._connection().execute('SELECT status, payload FROM requests ORDER BY pk')
+        return [self._from_row(status, payload) for status, payload in rows]
+
+
+def create_request_storage(backend='sqlite', data_dir='data'):
+    """Creates the configured request storage backend ('sqlite' or 'json')."""
+    json_path = os.path.join(data_dir, 'requests.json')
+    if backend == 'json':
+        return JsonRequestStorage(json_path)
+    if backend == 'sqlite':
+        return SqliteRequestStorage(os.path.join(data_dir, 'vedyura.db'), import_from=json_path)
+    raise ValueError(f"Unknown request storage backend: {backend}")
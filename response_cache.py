@@ -0,0 +1,83 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_message(text):
+    """
+    Lowercases a chat message and folds whitespace and punctuation that do not
+    change its meaning, so "What should I eat for breakfast?" and
+    "what should i eat  for breakfast" share a cache entry. Hyphens, '<', '>'
+    and decimal points are kept, since the food search reads them.
+    """
+    return re.sub(r'[\s?!,;:"]+', ' ', text.lower()).strip(' .')
+
+
+class ResponseCache:
+    """
+    In-memory LRU cache of chat answers with a time-to-live, counting hits
+    and misses. Keys are whatever identifies an answer, e.g. the normalized
+    message plus the user's profile fingerprint.
+    """
+
+    def __init__(self, max_entries=1024, ttl=600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (expires_at, value), least recently used first
+        self._entries = OrderedDict()
+        self.hits = self.misses = self.expired = self.evictions = 0
+
+    def get(self, key):
+        """Returns the cached value for `key`, or None if it is missing or has expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= self._clock():
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """The cached value for `key`, or compute() stored under it."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        }
@@ -0,0 +1,93 @@
+"""
+Measures how long a fresh worker takes to import the app and how much memory it uses.
+
+    python startup_benchmark.py [--runs 5] [--service all] [--first-use] [--preload]
+
+Each run imports app in a new interpreter, as a gunicorn worker would, and
+reports the import time, peak RSS and which heavy libraries (OpenCV, SciPy,
+FPDF) were loaded. --service picks what the worker serves (see app.py).
+--first-use also times loading the PPG and PDF modules afterwards, which is
+what the first scan or report in a worker pays. --preload sets
+VEDYURA_PRELOAD_PPG=1 to compare against loading PPG at startup.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ('cv2', 'scipy', 'fpdf', 'numpy')
+
+CHILD = '''
+import json, sys, time
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None
+
+result = {}
+start = time.perf_counter()
+import app
+result['import_ms'] = (time.perf_counter() - start) * 1e3
+result['rss_mb'] = peak_rss_mb()
+result['loaded'] = [name for name in %(heavy)r if name in sys.modules]
+
+if %(first_use)r:
+    start = time.perf_counter()
+    import ppg_signal, ppg_pipeline
+    ppg_pipeline.load_cascade(ppg_pipeline.FACE_CASCADE)
+    ppg_pipeline.load_cascade(ppg_pipeline.EYE_CASCADE)
+    result['ppg_ms'] = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    import pdf_reports
+    result['pdf_ms'] = (time.perf_counter() - start) * 1e3
+    result['rss_after_mb'] = peak_rss_mb()
+
+print(json.dumps(result))
+'''
+
+
+def measure(first_use=False, preload=False, service='all'):
+    """Imports app in a fresh interpreter and returns its measurements."""
+    env = dict(os.environ, VEDYURA_SERVICES=service)
+    if preload:
+        env['VEDYURA_PRELOAD_PPG'] = '1'
+    code = CHILD % {'heavy': HEAVY_MODULES, 'first_use': first_use}
+    output = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=env, capture_output=True, text=True, check=True).stdout
+    # The app prints while it starts; the measurements are the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--service', default='all', help="'api', 'compute' or 'all'")
+    parser.add_argument('--first-use', action='store_true', help='also time loading the PPG and PDF modules')
+    parser.add_argument('--preload', action='store_true', help='start with VEDYURA_PRELOAD_PPG=1')
+    args = parser.parse_args()
+
+    runs = [measure(args.first_use, args.preload, args.service) for _ in range(args.runs)]
+
+    def median(key):
+        values = [run[key] for run in runs if run.get(key) is not None]
+        return statistics.median(values) if values else float('nan')
+
+    print(f"App import ({args.service}), median of {args.runs} fresh interpreters"
+          f"{' (VEDYURA_PRELOAD_PPG=1)' if args.preload else ''}")
+    print(f"  import time   {median('import_ms'):8.1f} ms")
+    print(f"  peak RSS      {median('rss_mb'):8.1f} MB")
+    print(f"  loaded        {', '.join(runs[-1]['loaded']) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+    if args.first_use:
+        print(f"  first PPG use {median('ppg_ms'):8.1f} ms (OpenCV, SciPy, cascades)")
+        print(f"  first PDF use {median('pdf_ms'):8.1f} ms (FPDF)")
+        print(f"  peak RSS then {median('rss_after_mb'):8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -175,36 +175,132 @@ document.addEventListener('DOMContentLoaded', function() {
     //     });
     // }
     
+    // The diet chart renders in the background; download it once it is ready
+    const downloadDietChart = (button) => {
+        button.disabled = true;
+        requestReport('diet_chart')
+            .then(url => { window.location.href = url; })
+            .catch(error => alert(error.message))
+            .finally(() => { button.disabled = false; });
+    };
+
     // NEW: Add event listener for the daily chart button
     if(downloadDailyChartBtn) {
-        downloadDailyChartBtn.addEventListener('click', () => {
-            // Trigger the download, specifying 'daily' plan type
-            window.location.href = '/patient/generate-diet-chart?plan_type=daily';
-        });
+        downloadDailyChartBtn.addEventListener('click', () => downloadDietChart(downloadDailyChartBtn));
     }
 
     // NEW: Add event listener for the weekly chart button
     if(downloadWeeklyChartBtn) {
-        downloadWeeklyChartBtn.addEventListener('click', () => {
-            // Trigger the download, specifying 'weekly' plan type
-            window.location.href = '/patient/generate-diet-chart?plan_type=weekly';
-        });
+        downloadWeeklyChartBtn.addEventListener('click', () => downloadDietChart(downloadWeeklyChartBtn));
     }
 });
 
+/**
+ * ----------------------------------------
+ * Background PDF Reports
+ * ----------------------------------------
+ * Queues a report on /reports/<kind>/jobs and polls it until it has rendered.
+ * Resolves with the download URL. `body` is sent as a form if it is FormData,
+ * otherwise as JSON.
+ */
+const REPORT_POLL_INTERVAL = 500;
+
+function requestReport(kind, body) {
+    const options = { method: 'POST', credentials: 'same-origin' };
+    if (body instanceof FormData) {
+        options.body = body;
+    } else {
+        options.headers = { 'Content-Type': 'application/json' };
+        options.body = JSON.stringify(body || {});
+    }
+    return fetch(`/reports/${kind}/jobs`, options)
+        .then(response => response.json().then(job => {
+            if (!response.ok) {
+                throw new Error(job.error || 'Report request failed');
+            }
+            return waitForReport(job);
+        }));
+}
+
+function waitForReport(job) {
+    return new Promise((resolve, reject) => {
+        const check = (status, error) => {
+            if (status === 'done') {
+                resolve(job.download_url);
+            } else if (status === 'error') {
+                reject(new Error(error || 'PDF generation failed'));
+            } else {
+                setTimeout(() => {
+                    fetch(job.status_url, { credentials: 'same-origin' })
+                        .then(response => response.json())
+                        .then(state => check(state.status || 'error', state.error))
+                        .catch(reject);
+                }, REPORT_POLL_INTERVAL);
+            }
+        };
+        check(job.status);
+    });
+}
+
 // ========== ADD THIS SCRIPT FOR RECIPE SEARCH ==========
 document.addEventListener('DOMContentLoaded', function() {
     const findRecipesBtn = document.getElementById('find-recipes-btn');
     const recipeResultsContainer = document.getElementById('recipe-results-container');
+    const RECIPES_PER_PAGE = 20;
+
+    // Fetch one page of recipe names; instructions are loaded only when a recipe is opened
+    function fetchRecipePage(offset) {
+        return fetch(`/patient/get-recipes?fields=name,properties&limit=${RECIPES_PER_PAGE}&offset=${offset}`)
+            .then(response => response.json());
+    }
+
+    function renderRecipeItems(list, recipes) {
+        recipes.forEach(recipe => {
+            const item = document.createElement('li');
+            item.innerHTML = `<strong>${recipe.name}</strong>`;
+            item.style.cursor = 'pointer';
+            item.addEventListener('click', function() {
+                if (item.dataset.loaded) return;
+                item.dataset.loaded = 'true';
+                fetch(`/patient/recipes/${encodeURIComponent(recipe.id)}`)
+                    .then(response => response.json())
+                    .then(details => {
+                        if (details.error) return;
+                        const instructions = document.createElement('p');
+                        instructions.textContent = details.instructions;
+                        item.appendChild(instructions);
+                    });
+            });
+            list.appendChild(item);
+        });
+    }
+
+    function renderMoreButton(list, nextOffset) {
+        if (nextOffset === null || nextOffset === undefined) return;
+        const moreBtn = document.createElement('button');
+        moreBtn.className = 'recipe-btn';
+        moreBtn.textContent = 'Show more recipes';
+        moreBtn.addEventListener('click', function() {
+            moreBtn.disabled = true;
+            fetchRecipePage(nextOffset)
+                .then(data => {
+                    moreBtn.remove();
+                    if (data.error) return;
+                    renderRecipeItems(list, data.recipes);
+                    renderMoreButton(list, data.next_offset);
+                })
+                .catch(() => { moreBtn.disabled = false; });
+        });
+        recipeResultsContainer.appendChild(moreBtn);
+    }
 
     if (findRecipesBtn) {
         findRecipesBtn.addEventListener('click', function() {
             // Show a loading message
             recipeResultsContainer.innerHTML = '<p>Finding recipes for you...</p>';
 
-            // Fetch recipes from the backend API
-            fetch('/patient/get-recipes')
-                .then(response => response.json())
+            // Fetch the first page of recipes from the backend API
+            fetchRecipePage(0)
                 .then(data => {
                     if (data.error) {
                         recipeResultsContainer.innerHTML = `<p class="error">${data.error}</p>`;
@@ -217,14 +313,11 @@ document.addEventListener('DOMContentLoaded', function() {
                     }
 
                     // Build the HTML for the recipe list
-                    let recipesHtml = `<h4>Recommended Recipes for ${data.dosha} (${data.count} found)</h4>`;
-                    recipesHtml += '<ul>';
-                    data.recipes.forEach(recipe => {
-                        recipesHtml += `<li><strong>${recipe.recipe_name}</strong></li>`;
-                    });
-                    recipesHtml += '</ul>';
-
-                    recipeResultsContainer.innerHTML = recipesHtml;
+                    recipeResultsContainer.innerHTML = `<h4>Recommended Recipes for ${data.dosha} (${data.count} found)</h4>`;
+                    const list = document.createElement('ul');
+                    recipeResultsContainer.appendChild(list);
+                    renderRecipeItems(list, data.recipes);
+                    renderMoreButton(list, data.next_offset);
                 })
                 .catch(error => {
                     console.error('Error fetching recipes:', error);
@@ -233,4 +326,3 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 });
-// =======================================================
\ No newline at end of file
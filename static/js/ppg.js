@@ -9,25 +9,54 @@ $(document).ready(function() {
     let measurementInterval;
     let measurementStartTime = 0;
     const MEASUREMENT_DURATION = 25000; // 25 seconds for data collection
+    const MIN_MEASUREMENT_DURATION = 10000; // earliest stop once the live estimate is stable
+    const LIVE_POLL_INTERVAL = 1000;
+    let liveEstimate = null;
+    let livePollPending = false;
+
+    // Client mode: the browser reads the camera and posts forehead colour means
+    // to /ppg/samples instead of the server streaming its own camera. There is no
+    // face detection or liveness check in the browser, so a page opts in with
+    // data-client-mode="true" on the start button (and the server must allow it).
+    const CLIENT_MODE = $startBtn.data('client-mode') === true &&
+        !!(navigator.mediaDevices && navigator.mediaDevices.getUserMedia);
+    const SAMPLE_UPLOAD_INTERVAL = 1000; // post a batch every second
+    // Forehead region as fractions of the frame (face centred in the preview)
+    const FOREHEAD_ROI = { x: 0.38, y: 0.12, w: 0.24, h: 0.12 };
+    const roiSampler = CLIENT_MODE ? createROISampler() : null;
 
     // Start measurement
     $startBtn.on('click', function() {
         if (isMeasuring) return;
         
-        // --- FIX: Start the camera feed ---
-        $cameraFeed.attr('src', '/video_feed');
-        // --- END FIX ---
-
         // Show loading state
         $startBtn.prop('disabled', true).html('<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> Starting...');
         
         // Add pulsing effect to camera feed
         $cameraFeed.addClass('measurement-active');
         
-        // Start measurement on the server
+        const cameraReady = CLIENT_MODE ? roiSampler.open() : $.Deferred().resolve().promise();
+        cameraReady.then(function() {
+            if (!CLIENT_MODE) {
+                // Server mode: the server reads its own camera and streams a preview,
+                // encoded no wider than the feed is displayed
+                const width = Math.round(($cameraFeed.parent().width() || 320) * (window.devicePixelRatio || 1));
+                $cameraFeed.attr('src', '/video_feed?width=' + width);
+            }
+            startOnServer();
+        }, function() {
+            showError('Camera access was denied. Please allow camera access and try again.');
+            resetUI();
+        });
+    });
+
+    function startOnServer() {
         $.ajax({
-            url: '/start_measurement',
+            url: '/ppg/start',
             method: 'POST',
+            contentType: 'application/json',
+            // The rPPG method can be pinned per page with data-rppg-method on the start button
+            data: JSON.stringify({ mode: CLIENT_MODE ? 'client' : 'server', method: $startBtn.data('rppg-method') }),
             success: function(response) {
                 isMeasuring = true;
                 $startBtn.prop('disabled', true);
@@ -35,6 +64,9 @@ $(document).ready(function() {
                 
                 showInstruction('Please look at the camera and blink your eyes. The scan will run for 25 seconds.');
                 
+                if (CLIENT_MODE) {
+                    roiSampler.start();
+                }
                 // Start the timer that will automatically stop the measurement and show countdown
                 startPolling();
             },
@@ -43,7 +75,7 @@ $(document).ready(function() {
                 resetUI();
             }
         });
-    });
+    }
     
     // Stop measurement button handler (for manual stop)
     $stopBtn.on('click', stopMeasurement);
@@ -51,6 +83,8 @@ $(document).ready(function() {
     // This function now primarily acts as an automatic timeout and countdown timer
     function startPolling() {
         measurementStartTime = Date.now();
+        liveEstimate = null;
+        let lastLivePoll = 0;
         
         clearInterval(measurementInterval);
         
@@ -65,14 +99,40 @@ $(document).ready(function() {
             
             // --- NEW: Update the button text with remaining time ---
             const seconds = Math.ceil(remaining / 1000);
-            $startBtn.html(`Scanning... (${seconds}s)`);
+            const bpmText = liveEstimate && liveEstimate.bpm ? ` - ${Math.round(liveEstimate.bpm)} BPM` : '';
+            $startBtn.html(`Scanning... (${seconds}s)${bpmText}`);
             
-            // Auto-stop when time is up
-            if (remaining <= 0) {
+            // Auto-stop when time is up, or early once the live estimate has settled
+            const settled = liveEstimate && liveEstimate.stable && elapsed >= MIN_MEASUREMENT_DURATION;
+            if (remaining <= 0 || settled) {
                 stopMeasurement();
+                return;
+            }
+
+            if (Date.now() - lastLivePoll >= LIVE_POLL_INTERVAL) {
+                lastLivePoll = Date.now();
+                pollLiveEstimate();
             }
         }, 500); // Update countdown every half second
     }
+
+    // Fetches the server's running heart-rate estimate and its signal quality
+    function pollLiveEstimate() {
+        if (livePollPending) return;
+        livePollPending = true;
+        $.ajax({
+            url: '/ppg/live',
+            method: 'GET',
+            success: function(response) {
+                if (isMeasuring && response.status === 'success') {
+                    liveEstimate = response;
+                }
+            },
+            complete: function() {
+                livePollPending = false;
+            }
+        });
+    }
     
     // Function to stop the measurement
     function stopMeasurement() {
@@ -85,9 +145,15 @@ $(document).ready(function() {
         // Disable buttons and show processing state
         $startBtn.html('Processing...');
         $stopBtn.prop('disabled', true).html('<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span>');
-        
+
+        // In client mode, upload the last partial batch before asking for results
+        const uploaded = CLIENT_MODE ? roiSampler.stop() : $.Deferred().resolve().promise();
+        uploaded.always(requestResults);
+    }
+
+    function requestResults() {
         $.ajax({
-            url: '/stop_measurement',
+            url: '/ppg/stop',
             method: 'POST',
             timeout: 10000,
             success: function(response) {
@@ -119,6 +185,108 @@ $(document).ready(function() {
         // --- FIX: Stop the camera feed by clearing the src attribute ---
         $cameraFeed.attr('src', '');
         // --- END FIX ---
+        if (CLIENT_MODE) {
+            roiSampler.close();
+        }
+    }
+
+    // Reads the local camera, averages the forehead region of each frame on a
+    // tiny canvas and posts [timestamp, r, g, b] batches to the server.
+    function createROISampler() {
+        const video = document.createElement('video');
+        video.muted = true;
+        video.playsInline = true;
+        video.className = $cameraFeed.attr('class') || '';
+        video.style.cssText = $cameraFeed.attr('style') || '';
+
+        const canvas = document.createElement('canvas');
+        canvas.width = 32;
+        canvas.height = 16;
+        const context = canvas.getContext('2d', { willReadFrequently: true });
+
+        let stream = null;
+        let pending = [];
+        let uploadTimer = null;
+        let sampling = false;
+        let lastFrameTime = -1;
+
+        function open() {
+            const deferred = $.Deferred();
+            navigator.mediaDevices.getUserMedia({ video: { width: 640, height: 480 }, audio: false })
+                .then(function(mediaStream) {
+                    stream = mediaStream;
+                    video.srcObject = stream;
+                    $cameraFeed.hide().after(video);
+                    return video.play();
+                })
+                .then(function() { deferred.resolve(); }, function(err) { deferred.reject(err); });
+            return deferred.promise();
+        }
+
+        function sampleFrame() {
+            if (!sampling) return;
+            const vw = video.videoWidth, vh = video.videoHeight;
+            // requestAnimationFrame fires at the display rate; skip repaints of a frame already sampled
+            if (vw && vh && video.currentTime !== lastFrameTime) {
+                lastFrameTime = video.currentTime;
+                context.drawImage(video,
+                    vw * FOREHEAD_ROI.x, vh * FOREHEAD_ROI.y, vw * FOREHEAD_ROI.w, vh * FOREHEAD_ROI.h,
+                    0, 0, canvas.width, canvas.height);
+                const pixels = context.getImageData(0, 0, canvas.width, canvas.height).data;
+                let r = 0, g = 0, b = 0;
+                for (let i = 0; i < pixels.length; i += 4) {
+                    r += pixels[i];
+                    g += pixels[i + 1];
+                    b += pixels[i + 2];
+                }
+                const count = pixels.length / 4;
+                const timestamp = (performance.timeOrigin + performance.now()) / 1000;
+                pending.push([timestamp, r / count, g / count, b / count]);
+            }
+            if (video.requestVideoFrameCallback) {
+                video.requestVideoFrameCallback(sampleFrame);
+            } else {
+                requestAnimationFrame(sampleFrame);
+            }
+        }
+
+        function upload() {
+            if (!pending.length) return $.Deferred().resolve().promise();
+            const batch = pending;
+            pending = [];
+            return $.ajax({
+                url: '/ppg/samples',
+                method: 'POST',
+                contentType: 'application/json',
+                data: JSON.stringify({ samples: batch })
+            });
+        }
+
+        return {
+            open: open,
+            start: function() {
+                pending = [];
+                sampling = true;
+                sampleFrame();
+                uploadTimer = setInterval(upload, SAMPLE_UPLOAD_INTERVAL);
+            },
+            stop: function() {
+                sampling = false;
+                clearInterval(uploadTimer);
+                return upload();
+            },
+            close: function() {
+                sampling = false;
+                clearInterval(uploadTimer);
+                if (stream) {
+                    stream.getTracks().forEach(function(track) { track.stop(); });
+                    stream = null;
+                }
+                video.srcObject = null;
+                $(video).detach();
+                $cameraFeed.show();
+            }
+        };
     }
     
     // Helper function to show a temporary message
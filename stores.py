@@ -0,0 +1,30 @@
+import os
+
+from recipe_store import RecipeStore
+from request_storage import create_request_storage
+from user_directory import UserDirectory
+from diagnosis_cache import DiagnosisMetricsCache
+from personal_diet_tool import chat_context
+
+# --- Data stores shared by the blueprints ---
+# One instance of each per process, created when the first blueprint using it is imported.
+
+# Ensure data directory exists
+if not os.path.exists('data'):
+    os.makedirs('data')
+
+# Recipes are parsed once and re-read only when data/recipes.json changes
+recipe_store = RecipeStore('data/recipes.json')
+
+# Consultation requests live in SQLite by default; set VEDYURA_REQUEST_STORAGE=json
+# to keep using data/requests.json directly.
+request_storage = create_request_storage(os.environ.get('VEDYURA_REQUEST_STORAGE', 'sqlite'))
+
+# Users indexed by id and role; data/users.json is re-read only when it changes
+user_directory = UserDirectory('data/users.json')
+
+# Doctor-facing metrics derived from each patient_diagnosis_<id>.json
+diagnosis_metrics = DiagnosisMetricsCache('data')
+
+# Each patient's chat context (dosha, goal, allergies), derived once per saved diagnosis
+chat_contexts = DiagnosisMetricsCache('data', summarize=chat_context)
@@ -0,0 +1,64 @@
+import json
+import os
+import threading
+
+
+class UserDirectory:
+    """
+    In-memory view of users.json indexed by id and by role. The file is re-read
+    only when its mtime changes, so lookups are O(1) dictionary accesses.
+
+    Returned user dicts are shared; copy them before adding per-request fields.
+    """
+
+    def __init__(self, path='data/users.json'):
+        self.path = path
+        self._lock = threading.Lock()
+        # (mtime, {id: user}, {role: [users]}) swapped in as one unit
+        self._snapshot = (None, {}, {})
+
+    def _load(self):
+        """Returns the current snapshot, reloading it if the file has changed."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        snapshot = self._snapshot
+        if snapshot[0] == mtime and mtime is not None:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot[0] == mtime and mtime is not None:
+                return self._snapshot
+
+            try:
+                with open(self.path, 'r') as f:
+                    users = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                users = []
+
+            by_id = {}
+            by_role = {}
+            for user in users:
+                if not isinstance(user, dict):
+                    continue
+                by_id[str(user.get('id'))] = user
+                by_role.setdefault(user.get('role'), []).append(user)
+
+            self._snapshot = (mtime, by_id, by_role)
+            return self._snapshot
+
+    def get(self, user_id):
+        """Returns the user with the given id, or None."""
+        return self._load()[1].get(str(user_id))
+
+    def by_role(self, role):
+        """Returns all users with the given role ('doctor' or 'patient')."""
+        return self._load()[2].get(role, [])
+
+    def authenticate(self, role, user_id, password):
+        """Returns the user if the id, password and role all match, otherwise None."""
+        user = self.get(user_id)
+        if user and user.get('role') == role and str(user.get('password')) == password:
+            return user
+        return None